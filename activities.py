@@ -0,0 +1,116 @@
+import io
+import logging
+import zipfile
+from datetime import datetime
+from geodesy import cumulative_distance
+from routing import get_router
+from fit_writer import FITWriter
+from tcx_writer import TCXWriter
+
+# Fonctions de génération partagées par les applications Streamlit et la CLI
+# batch_generate.py ; aucune dépendance à Streamlit ici. osmnx, scipy et gpxpy
+# ne sont importés que par les fonctions qui s'en servent (voir
+# benchmarks/startup.py).
+
+
+# ---------- Parcours ----------
+
+def generate_loops(start_lat, start_lon, target_distance_km=5, num_routes=3, workers=None, seed=None,
+                   activity="Running"):
+    """
+    Boucles locales sur le graphe OSM du type d'activité (réseau piéton ou vélo,
+    mis en cache sur disque), chargé sur un rayon adapté à la distance comme
+    pour le routeur "local" (mailles recousues et repères ALT pour les grandes
+    distances, voir routing.py).
+    Renvoie le `CompactGraph` et une liste de (chemin en indices de nœuds, longueur en m).
+    """
+    logging.info("Génération des boucles avec les paramètres : lat=%s, lon=%s, distance=%s km, nombre=%s, "
+                 "activité=%s", start_lat, start_lon, target_distance_km, num_routes, activity)
+    router = get_router("local", activity, workers)
+    graph, loops = router.loops(start_lat, start_lon, target_distance_km, num_routes=num_routes, seed=seed)
+    logging.info("Nombre total de boucles générées : %s", len(loops))
+    return graph, loops
+
+
+def generate_route(start_lat, start_lon, distance_km, seed, router=None, activity="Running", workers=None):
+    """
+    Une boucle pour une graine, au format [(lon, lat), ...] ; `router` choisit
+    le calcul ("ors" ou "local", voir routing.py), `activity` le réseau
+    (piéton ou vélo), `workers` le nombre de processus du calcul local.
+    """
+    return get_router(router, activity, workers).round_trip(start_lat, start_lon, distance_km, seed)
+
+
+def generate_routes(start_lat, start_lon, distance_km, seeds, router=None, activity="Running", workers=None):
+    """
+    Une boucle par graine, dans l'ordre des graines (requêtes ORS parallèles).
+    """
+    return get_router(router, activity, workers).round_trips(start_lat, start_lon, distance_km, seeds)
+
+
+def compute_total_distance_km(coords):
+    _, cumulative = cumulative_distance(coords)
+    return cumulative[-1] / 1000
+
+
+# ---------- Export ----------
+
+def create_tcx(telemetry, activity_type, out=None):
+    return create_multi_tcx([telemetry], [activity_type], out)
+
+
+def create_multi_tcx(telemetries, activity_types, out=None):
+    """
+    Un seul fichier TCX contenant une activité (un tour) par télémétrie.
+    """
+    if out is None:
+        out = io.BytesIO()
+    writer = TCXWriter(out)
+    for telemetry, activity_type in zip(telemetries, activity_types):
+        writer.start_activity(activity_type, datetime.fromisoformat(telemetry.time[0]))
+        writer.write_trackpoints(telemetry.time, telemetry.lat, telemetry.lon,
+                                 telemetry.altitude, telemetry.heart_rate)
+        writer.end_activity(int(telemetry.elapsed_s[-1]), int(telemetry.distance_m[-1]), telemetry.calories)
+    writer.close()
+    return out
+
+
+def create_fit(telemetry, activity_type):
+    """
+    Même activité que `create_tcx`, au format binaire FIT (octets).
+    """
+    writer = FITWriter(activity_type, datetime.fromisoformat(telemetry.time[0]))
+    writer.write_records(telemetry.elapsed_s, telemetry.lat, telemetry.lon, telemetry.altitude,
+                         telemetry.heart_rate, telemetry.distance_m, telemetry.speed_kmh)
+    writer.close(int(telemetry.elapsed_s[-1]), telemetry.distance_m[-1], telemetry.calories)
+    return writer.getvalue()
+
+
+def zip_bundle(files):
+    """
+    Archive zip (octets) des fichiers [(nom, octets), ...].
+    """
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for name, data in files:
+            bundle.writestr(name, data)
+    return out.getvalue()
+
+
+def export_gpx(coords, index):
+    """
+    Boucle au format GPX, `coords` étant une liste de (lat, lon).
+    """
+    import gpxpy.gpx
+
+    logging.info("Exportation de la boucle %s en GPX", index + 1)
+    gpx = gpxpy.gpx.GPX()
+    gpx_track = gpxpy.gpx.GPXTrack()
+    gpx.tracks.append(gpx_track)
+    gpx_segment = gpxpy.gpx.GPXTrackSegment()
+    gpx_track.segments.append(gpx_segment)
+
+    for lat, lon in coords:
+        gpx_segment.points.append(gpxpy.gpx.GPXTrackPoint(lat, lon))
+
+    return gpx.to_xml()
@@ -0,0 +1,173 @@
+"""
+Relecture des fichiers TCX et GPX (générés ici ou enregistrés par une montre),
+en flux : `iterparse` et suppression de chaque Trackpoint une fois lu, seules
+les colonnes NumPy de l'activité en cours restent en mémoire.
+
+    python activity_reader.py corpus/*.tcx
+"""
+import argparse
+import sys
+import warnings
+import xml.etree.ElementTree as ET
+from array import array
+from collections import namedtuple
+import numpy as np
+from geodesy import cumulative_distance
+
+Track = namedtuple("Track", [
+    "sport",        # attribut Sport (TCX), type ou nom de la trace (GPX)
+    "time",         # datetime64[us], NaT si absent
+    "lat",
+    "lon",
+    "altitude",
+    "heart_rate",
+    "distance_m",   # distance cumulée enregistrée (TCX), NaN si absente
+])
+
+Summary = namedtuple("Summary", [
+    "sport", "points", "duration_s", "distance_m", "recorded_distance_m",
+    "avg_speed_kmh", "hr_mean", "hr_min", "hr_max",
+])
+
+ACTIVITY_TAGS = {"Activity", "trk"}
+POINT_TAGS = {"Trackpoint", "trkpt"}
+# Éléments lus à l'intérieur d'un point -> colonne
+FIELD_TAGS = {
+    "Time": "time", "time": "time",
+    "LatitudeDegrees": "lat", "LongitudeDegrees": "lon",
+    "AltitudeMeters": "altitude", "ele": "altitude",
+    "DistanceMeters": "distance_m",
+    "Value": "heart_rate", "hr": "heart_rate",  # HeartRateBpm/Value (TCX), gpxtpx:hr (GPX)
+}
+NUMERIC = ("lat", "lon", "altitude", "heart_rate", "distance_m")
+TIME_CHUNK = 65536  # horodatages convertis par paquets
+
+
+def parse_times(strings):
+    """
+    Horodatages ISO 8601 -> datetime64[us] ; les dates avec fuseau sont
+    ramenées en UTC, les dates naïves gardées telles quelles.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return np.array([s or "NaT" for s in strings], dtype="datetime64[us]")
+
+
+class _Columns:
+    def __init__(self, sport):
+        self.sport = sport
+        self.values = {name: array("d") for name in NUMERIC}
+        self.times = []
+        self.time_chunks = []
+
+    def append(self, point):
+        for name in NUMERIC:
+            text = point.get(name)
+            self.values[name].append(float(text) if text else np.nan)
+        self.times.append(point.get("time"))
+        if len(self.times) >= TIME_CHUNK:
+            self.time_chunks.append(parse_times(self.times))
+            self.times = []
+
+    def track(self):
+        self.time_chunks.append(parse_times(self.times))
+        columns = {name: np.frombuffer(values, dtype=np.float64) for name, values in self.values.items()}
+        return Track(sport=self.sport, time=np.concatenate(self.time_chunks), **columns)
+
+
+def iter_activities(source):
+    """
+    Une `Track` par Activity (TCX) ou trk (GPX) de `source` (chemin ou
+    fichier binaire), au fil de la lecture.
+    """
+    stack = []
+    columns = None
+    point = None
+    local_names = {}  # {espace de noms}nom -> nom
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        tag = local_names.get(elem.tag)
+        if tag is None:
+            tag = local_names[elem.tag] = elem.tag.rpartition("}")[2]
+        if event == "start":
+            stack.append(elem)
+            if tag in POINT_TAGS:
+                point = {"lat": elem.get("lat"), "lon": elem.get("lon")}
+            elif tag in ACTIVITY_TAGS:
+                columns = _Columns(elem.get("Sport", ""))
+            continue
+
+        stack.pop()
+        if point is not None and tag in FIELD_TAGS:
+            point[FIELD_TAGS[tag]] = elem.text
+        elif tag in POINT_TAGS:
+            columns.append(point)
+            point = None
+            _drop(stack, elem)
+        elif tag in ACTIVITY_TAGS:
+            yield columns.track()
+            columns = None
+            _drop(stack, elem)
+        elif tag in ("type", "name") and columns is not None and not columns.sport:
+            columns.sport = (elem.text or "").strip()
+
+
+def _drop(stack, elem):
+    # L'élément lu est vidé et retiré de son parent : l'arbre reste de taille constante
+    elem.clear()
+    if stack:
+        stack[-1].remove(elem)
+
+
+def summarize(track):
+    """
+    Statistiques d'une activité : distance recalculée sur les positions (et
+    distance enregistrée si le fichier en contient), durée, vitesse moyenne, FC.
+    """
+    has_position = ~(np.isnan(track.lat) | np.isnan(track.lon))
+    _, cumulative = cumulative_distance(np.column_stack((track.lon[has_position], track.lat[has_position])))
+    distance = float(cumulative[-1])
+    times = track.time[~np.isnat(track.time)]
+    duration = float((times[-1] - times[0]) / np.timedelta64(1, "s")) if len(times) else 0.0
+    recorded = track.distance_m[~np.isnan(track.distance_m)]
+    hr = track.heart_rate[~np.isnan(track.heart_rate)]
+    return Summary(
+        sport=track.sport,
+        points=len(track.lat),
+        duration_s=duration,
+        distance_m=distance,
+        recorded_distance_m=float(recorded[-1]) if len(recorded) else None,
+        avg_speed_kmh=distance / duration * 3.6 if duration > 0 else None,
+        hr_mean=float(hr.mean()) if len(hr) else None,
+        hr_min=float(hr.min()) if len(hr) else None,
+        hr_max=float(hr.max()) if len(hr) else None,
+    )
+
+
+def _format(summary):
+    text = (f"{summary.sport or '?':8s} {summary.points:7d} pts  {summary.distance_m / 1000:8.2f} km  "
+            f"{summary.duration_s / 60:7.1f} min")
+    if summary.avg_speed_kmh is not None:
+        text += f"  {summary.avg_speed_kmh:5.1f} km/h"
+    if summary.hr_mean is not None:
+        text += f"  FC {summary.hr_mean:5.1f} ({summary.hr_min:.0f}-{summary.hr_max:.0f})"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="fichiers TCX ou GPX")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.files:
+        try:
+            for index, track in enumerate(iter_activities(path)):
+                print(f"{path}[{index}] {_format(summarize(track))}")
+        except ET.ParseError as e:
+            print(f"{path} : fichier illisible ({e})", file=sys.stderr)
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
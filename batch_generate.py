@@ -0,0 +1,260 @@
+"""
+Génération en masse d'activités TCX/GPX sans interface Streamlit.
+
+Le manifeste (CSV avec en-tête, ou JSON Lines) décrit une ligne par point de
+départ ; seules lat, lon et distance_km sont obligatoires :
+
+    name,lat,lon,distance_km,speed_kmh,hr,activity,count,seed,router
+    paris,48.8566,2.3522,5,10,140,Running,500,0,local
+
+Chaque ligne produit `count` activités (graines seed, seed+1, ...). Les fichiers
+déjà présents dans la sortie sont ignorés : une exécution interrompue reprend
+là où elle s'était arrêtée.
+
+    python batch_generate.py manifest.csv --out corpus/ --formats tcx fit gpx --workers 8
+    python batch_generate.py manifest.csv --tar corpus.tar
+    python batch_generate.py manifest.csv --interval 1 --smart-recording
+    TCX_OSM_EXTRACT=ile-de-france.osm.pbf python batch_generate.py manifest.csv
+
+Le routeur "local" calcule les boucles sur le graphe OSM (tuiles en cache, ou
+l'extrait TCX_OSM_EXTRACT sans aucun accès réseau), "ors" interroge
+OpenRouteService.
+"""
+import argparse
+import csv
+import re
+import io
+import json
+import logging
+import multiprocessing as mp
+import os
+import sys
+import tarfile
+import time
+from activities import generate_route, create_tcx, create_fit, export_gpx
+from elevation import get_dem
+from ors_client import share_quota
+from routing import get_router
+from telemetry import synthesize_telemetry, smart_recording
+
+DEFAULTS = {"speed_kmh": 10.0, "hr": 140, "activity": "Running", "count": 1, "seed": 0, "router": "local"}
+UNSAFE_NAME = re.compile(r"[^\w-]+")
+
+
+def read_manifest(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    return [{k: v for k, v in row.items() if v not in ("", None)} for row in rows]
+
+
+def safe_name(name, default):
+    """
+    Nom de fichier sans séparateur de chemin ni caractère spécial, pour que le
+    manifeste ne puisse pas écrire hors de --out ou de l'archive.
+    """
+    name = UNSAFE_NAME.sub("_", os.path.basename(str(name).replace("\\", "/"))).strip("_")
+    return name or default
+
+
+def expand_jobs(rows, formats, interval_s=None, smart=False):
+    """
+    Une tâche par activité à produire, avec le nom de ses fichiers de sortie.
+    """
+    jobs = []
+    for index, row in enumerate(rows):
+        row = {**DEFAULTS, **row}
+        name = safe_name(row.get("name", ""), f"row{index}")
+        for k in range(int(row["count"])):
+            stem = f"{name}_{k:05d}"
+            jobs.append({
+                "lat": float(row["lat"]),
+                "lon": float(row["lon"]),
+                "distance_km": float(row["distance_km"]),
+                "speed_kmh": float(row["speed_kmh"]),
+                "hr": float(row["hr"]),
+                "activity": row["activity"],
+                "seed": int(row["seed"]) + k,
+                "router": row["router"],
+                "interval_s": interval_s,
+                "smart": smart,
+                "files": [f"{stem}.{fmt}" for fmt in formats],
+            })
+    return jobs
+
+
+def build_activity(job):
+    """
+    Tracé + télémétrie + sérialisation d'une activité (exécuté dans le pool).
+    Renvoie [(nom de fichier, octets)], vide si aucun parcours n'a été trouvé.
+    """
+    try:
+        # Le pool parallélise déjà les activités : une seule recherche par processus
+        coords = generate_route(job["lat"], job["lon"], job["distance_km"], job["seed"], job["router"],
+                                job["activity"], workers=1)
+    except Exception as e:
+        logging.warning("Parcours impossible pour %s : %s", job["files"][0], e)
+        return []
+    if len(coords) < 2:
+        return []
+
+    outputs = []
+    telemetry = None
+    for name in job["files"]:
+        if name.endswith((".tcx", ".fit")) and telemetry is None:
+            telemetry = synthesize_telemetry(coords, job["speed_kmh"], job["hr"], seed=job["seed"],
+                                             interval_s=job["interval_s"], elevation=get_dem())
+            if job["smart"]:
+                telemetry = smart_recording(telemetry)
+        if name.endswith(".tcx"):
+            outputs.append((name, create_tcx(telemetry, job["activity"]).getvalue()))
+        elif name.endswith(".fit"):
+            outputs.append((name, create_fit(telemetry, job["activity"])))
+        else:
+            gpx = export_gpx([(lat, lon) for lon, lat in coords], job["seed"])
+            outputs.append((name, gpx.encode("utf-8")))
+    return outputs
+
+
+class DirectorySink:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.existing = set(os.listdir(path))
+
+    def write(self, name, data):
+        tmp_path = os.path.join(self.path, name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.path, name))
+
+    def close(self):
+        pass
+
+
+class TarSink:
+    def __init__(self, path):
+        self.existing = set()
+        if os.path.exists(path):
+            self.existing = self._recover(path)
+        self.tar = tarfile.open(path, "a")
+
+    @staticmethod
+    def _recover(path):
+        """
+        Noms des membres complets d'une archive existante. Si une exécution a
+        été interrompue pendant l'écriture d'un membre, l'archive est coupée
+        après le dernier membre complet pour pouvoir être complétée.
+        """
+        size = os.path.getsize(path)
+        if size < tarfile.BLOCKSIZE:
+            os.remove(path)  # premier en-tête incomplet : rien à reprendre
+            return set()
+        with open(path, "rb") as f:
+            if f.read(tarfile.BLOCKSIZE)[257:262] != b"ustar":
+                raise tarfile.ReadError(f"{path} n'est pas une archive tar")
+        names, end = set(), 0
+        try:
+            with tarfile.open(path, "r") as tar:
+                for member in iter(tar.next, None):
+                    data_end = member.offset_data + -(-member.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                    if data_end > size:
+                        break  # contenu du membre tronqué
+                    names.add(member.name)
+                    end = data_end
+        except tarfile.ReadError:
+            pass  # premier membre tronqué
+        with open(path, "r+b") as f:
+            f.seek(end)
+            tail = f.read()
+            if len(tail) >= tarfile.BLOCKSIZE and not tail.strip(b"\0"):
+                return names  # seuls les blocs de fin d'archive suivent
+            logging.warning("Archive %s tronquée : reprise après %s membre(s) complet(s)", path, len(names))
+            f.truncate(end)
+            f.seek(end)
+            f.write(bytes(2 * tarfile.BLOCKSIZE))  # fin d'archive, attendue par le mode "a"
+        return names
+
+    def write(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.tar.close()
+
+
+def warm_graphs(jobs):
+    """
+    Charge une fois, avant le pool, le graphe de chaque zone des tâches
+    "local" : les tuiles absentes du cache sont téléchargées par ce seul
+    processus plutôt que par tous les processus du pool à la fois.
+    """
+    areas = {(job["lat"], job["lon"], job["distance_km"], job["activity"])
+             for job in jobs if job["router"] == "local"}
+    for lat, lon, distance_km, activity in sorted(areas):
+        try:
+            get_router("local", activity, workers=1).graph(lat, lon, distance_km)
+        except Exception as e:
+            logging.warning("Graphe indisponible autour de (%s, %s) : %s", lat, lon, e)
+
+
+def run(jobs, sink, workers):
+    """
+    Exécute les tâches manquantes dans un pool de processus et écrit les
+    fichiers au fil de l'eau. Renvoie (activités écrites, échecs, ignorées).
+    """
+    todo = [job for job in jobs if not all(name in sink.existing for name in job["files"])]
+    skipped = len(jobs) - len(todo)
+    written = failed = 0
+    warm_graphs(todo)
+    started = time.monotonic()
+    # Chaque processus a son propre client ORS : le quota de la clé est réparti entre eux
+    workers = workers or os.cpu_count()
+    uses_ors = any(job["router"] == "ors" for job in todo)
+    with mp.Pool(workers, initializer=share_quota if uses_ors else None, initargs=(workers,)) as pool:
+        for done, outputs in enumerate(pool.imap_unordered(build_activity, todo, chunksize=4), 1):
+            if outputs:
+                for name, data in outputs:
+                    sink.write(name, data)
+                written += 1
+            else:
+                failed += 1
+            rate = done / max(time.monotonic() - started, 1e-9)
+            print(f"\r[{done}/{len(todo)}] {written} écrites, {failed} échecs, {rate:.1f} activités/s",
+                  end="", file=sys.stderr, flush=True)
+    if todo:
+        print(file=sys.stderr)
+    return written, failed, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="fichier CSV ou JSON Lines")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--out", default="activities", help="répertoire de sortie (défaut : activities/)")
+    target.add_argument("--tar", help="archive tar de sortie, complétée si elle existe déjà")
+    parser.add_argument("--formats", nargs="+", choices=["tcx", "fit", "gpx"], default=["tcx"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--interval", type=int, help="un Trackpoint toutes les N secondes (défaut : un par sommet)")
+    parser.add_argument("--smart-recording", action="store_true",
+                        help="ne garder que les points utiles au tracé (implique --interval 1 par défaut)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    interval_s = args.interval or (1 if args.smart_recording else None)
+    jobs = expand_jobs(read_manifest(args.manifest), args.formats, interval_s, args.smart_recording)
+    sink = TarSink(args.tar) if args.tar else DirectorySink(args.out)
+    try:
+        written, failed, skipped = run(jobs, sink, args.workers)
+    finally:
+        sink.close()
+    print(f"{written} activité(s) écrite(s), {failed} échec(s), {skipped} déjà présente(s)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
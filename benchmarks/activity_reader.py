@@ -0,0 +1,81 @@
+"""
+Lecture en flux d'un gros TCX multi-activités : débit de `iter_activities`
+sur un fichier de plusieurs centaines de Mo, puis pic mémoire comparé à
+ElementTree.parse (arbre complet) sur un fichier plus petit.
+
+    python -m benchmarks.activity_reader --megabytes 300 --compare-megabytes 20
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from activity_reader import iter_activities
+from benchmarks.geodesy import synthetic_track
+from tcx_writer import TCXWriter
+from telemetry import synthesize_telemetry
+
+
+def write_corpus(path, megabytes):
+    """
+    TCX d'activités d'une heure (3600 points) jusqu'à la taille demandée.
+    Renvoie (activités, points).
+    """
+    telemetry = synthesize_telemetry(synthetic_track(3600), 10, 150, seed=0, start_time=datetime(2024, 1, 1),
+                                     interval_s=1)
+    activities = 0
+    with open(path, "wb") as out:
+        writer = TCXWriter(out)
+        while out.tell() < megabytes * 1e6:
+            writer.start_activity("Running", datetime(2024, 1, 1))
+            writer.write_trackpoints(telemetry.time, telemetry.lat, telemetry.lon,
+                                     telemetry.altitude, telemetry.heart_rate)
+            writer.end_activity(int(telemetry.elapsed_s[-1]), int(telemetry.distance_m[-1]), telemetry.calories)
+            activities += 1
+        writer.close()
+    return activities, activities * len(telemetry.lat)
+
+
+def stream(path):
+    activities = points = 0
+    for track in iter_activities(path):
+        activities += 1
+        points += len(track.lat)
+    return activities, points
+
+
+def peak_mb(function, *args):
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=300)
+    parser.add_argument("--compare-megabytes", type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.tcx")
+        activities, points = write_corpus(path, args.megabytes)
+        size = os.path.getsize(path) / 1e6
+        t0 = time.perf_counter()
+        assert stream(path) == (activities, points)
+        elapsed = time.perf_counter() - t0
+        print(f"iter_activities : {size:.0f} Mo, {activities} activités, {points} points en {elapsed:.1f} s "
+              f"({size / elapsed:.1f} Mo/s, {points / elapsed / 1e3:.0f} k points/s)")
+
+        small = os.path.join(directory, "small.tcx")
+        write_corpus(small, args.compare_megabytes)
+        size = os.path.getsize(small) / 1e6
+        print(f"pic mémoire sur {size:.0f} Mo : iter_activities {peak_mb(stream, small):.1f} Mo, "
+              f"ElementTree.parse {peak_mb(ET.parse, small):.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Comparaison networkx / CompactGraph pour le calcul des boucles.
+
+    python -m benchmarks.compact_graph              # grille synthétique (hors ligne)
+    python -m benchmarks.compact_graph --lat 48.8566 --lon 2.3522 --radius 3000
+"""
+import argparse
+import math
+import pickle
+import random
+import time
+import networkx as nx
+import numpy as np
+from compact_graph import CompactGraph
+from loop_engine import find_loops
+
+
+def synthetic_graph(size, seed=0):
+    """
+    Grille piétonne size × size (~100 m entre intersections), arêtes dans les deux sens.
+    """
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    for i in range(size):
+        for j in range(size):
+            G.add_node(i * size + j, y=48.8 + i * 0.0009, x=2.3 + j * 0.0013)
+    for i in range(size):
+        for j in range(size):
+            a = i * size + j
+            for b in ([a + 1] if j < size - 1 else []) + ([a + size] if i < size - 1 else []):
+                length = 90 + 20 * rng.random()
+                G.add_edge(a, b, length=length)
+                G.add_edge(b, a, length=length)
+    return G
+
+
+def star_graph(branches, length, seed=0):
+    """
+    Arbre en étoile : `branches` rues de `length` tronçons (~100 m) autour du nœud 0.
+    """
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    G.add_node(0, y=48.8, x=2.3)
+    for b in range(branches):
+        angle = 2 * math.pi * b / branches
+        previous = 0
+        for k in range(1, length + 1):
+            node = b * length + k
+            G.add_node(node, y=48.8 + k * 0.0009 * math.cos(angle), x=2.3 + k * 0.0013 * math.sin(angle))
+            d = 90 + 20 * rng.random()
+            G.add_edge(previous, node, length=d)
+            G.add_edge(node, previous, length=d)
+            previous = node
+    return G
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=300, help="côté de la grille synthétique")
+    parser.add_argument("--lat", type=float)
+    parser.add_argument("--lon", type=float)
+    parser.add_argument("--radius", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--distance-km", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.lat is not None and args.lon is not None:
+        from graph_cache import load_graph
+        G = load_graph(args.lat, args.lon, args.radius, network_type="walk")
+    else:
+        G = synthetic_graph(args.size)
+    source = next(iter(G.nodes))
+    print(f"Graphe : {len(G)} nœuds, {G.number_of_edges()} arêtes")
+
+    t_convert, graph = timed(lambda: CompactGraph.from_networkx(G), 1)
+    root = graph.index_of(source)
+    print(f"Conversion CSR          : {t_convert * 1000:8.1f} ms")
+
+    t_nx, (pred, dist) = timed(lambda: nx.dijkstra_predecessor_and_distance(G, source, weight="length"), args.repeat)
+    t_csr, (dist_csr, _) = timed(lambda: graph.dijkstra(root), args.repeat)
+    print(f"Dijkstra networkx       : {t_nx * 1000:8.1f} ms")
+    print(f"Dijkstra CSR (scipy)    : {t_csr * 1000:8.1f} ms  (x{t_nx / t_csr:.1f})")
+
+    nodes = list(G.nodes)
+    t_nx_xy, _ = timed(lambda: [(G.nodes[n]["y"], G.nodes[n]["x"]) for n in nodes], args.repeat)
+    idx = list(range(len(graph)))
+    t_csr_xy, _ = timed(lambda: graph.coords(idx), args.repeat)
+    print(f"Coordonnées networkx    : {t_nx_xy * 1000:8.1f} ms")
+    print(f"Coordonnées CSR         : {t_csr_xy * 1000:8.1f} ms  (x{t_nx_xy / t_csr_xy:.1f})")
+
+    size_nx = len(pickle.dumps(G, protocol=pickle.HIGHEST_PROTOCOL))
+    size_csr = sum(a.nbytes for a in (graph.node_ids, graph.lat, graph.lon,
+                                      graph.offsets, graph.targets, graph.lengths))
+    print(f"Taille networkx (pickle): {size_nx / 1e6:8.1f} Mo")
+    print(f"Taille CSR (tableaux)   : {size_csr / 1e6:8.1f} Mo  (x{size_nx / size_csr:.1f})")
+
+    far = max(dist, key=dist.get)
+    assert abs(dist[far] - dist_csr[graph.index_of(far)]) < 1e-6 * dist[far] + 1e-2
+
+    # Identifiant absent du graphe : KeyError pour un nœud, -1 dans un tableau
+    missing = int(graph.node_ids.max()) + 1
+    try:
+        graph.index_of(missing)
+        raise AssertionError("index_of accepte un nœud absent")
+    except KeyError:
+        pass
+    below = int(graph.node_ids.min()) - 1
+    assert graph.indices_of([source, missing, far, below]).tolist() == [root, -1, graph.index_of(far), -1]
+
+    # Pour une graine donnée, le mode parallèle rend exactement les boucles du mode séquentiel
+    center = int(graph.nearest(graph.lat.mean(), graph.lon.mean())[0])
+    totals = [0.0, 0.0]
+    found = 0
+    for seed in range(3):
+        t_seq, sequential = timed(lambda: find_loops(graph, center, args.distance_km * 1000, seed=seed), 1)
+        t_par, parallel = timed(lambda: find_loops(graph, center, args.distance_km * 1000, seed=seed,
+                                                   workers=args.workers), 1)
+        assert sequential and len(sequential) == len(parallel) and all(
+            np.array_equal(a, b) and la == lb for (a, la), (b, lb) in zip(sequential, parallel))
+        totals[0] += t_seq
+        totals[1] += t_par
+        found += len(sequential)
+    label = f"Boucles, {args.workers} processus"
+    print(f"Boucles, séquentiel     : {totals[0] * 1000:8.1f} ms  ({found} boucles)")
+    print(f"{label:24s}: {totals[1] * 1000:8.1f} ms  (résultats identiques)")
+
+    # Sur un arbre, tout trajet qui revient au départ est un aller-retour : aucune boucle
+    star = CompactGraph.from_networkx(star_graph(8, 20))
+    for seed in range(5):
+        assert find_loops(star, 0, 4000, seed=seed) == []
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Lecture d'altitude sur MNT synthétique : tuiles .hgt écrites dans un répertoire
+temporaire (un plan incliné, que l'interpolation bilinéaire doit reproduire
+exactement), puis débit de `DEMTiles.elevation` sur des points aléatoires
+répartis sur plusieurs tuiles, avec moins de tuiles ouvertes que de tuiles lues.
+
+    python -m benchmarks.elevation --points 1000000 --size 1201
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from elevation import DEMTiles, VOID, tile_name
+
+
+def plane(lat, lon):
+    return 100 + 1000 * (lat - 48) + 500 * (lon - 2)
+
+
+def write_tile(directory, lat_floor, lon_floor, size, void=None):
+    """
+    Tuile .hgt du plan `plane` (ligne 0 au nord), avec un pixel sans donnée optionnel.
+    """
+    lat = lat_floor + 1 - np.arange(size) / (size - 1)
+    lon = lon_floor + np.arange(size) / (size - 1)
+    heights = np.round(plane(lat[:, None], lon[None, :])).astype(">i2")
+    if void is not None:
+        heights[void] = VOID
+    heights.tofile(os.path.join(directory, tile_name(lat_floor, lon_floor)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1000000)
+    parser.add_argument("--size", type=int, default=1201, help="1201 (SRTM3) ou 3601 (SRTM1)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for lat_floor in (48, 49):
+            for lon_floor in (2, 3):
+                write_tile(directory, lat_floor, lon_floor, args.size)
+        dem = DEMTiles(directory, max_open=2)
+        # Hauteurs .hgt entières : l'écart au plan ne vient que de l'arrondi (≤ 0,5 m)
+        rng = np.random.default_rng(0)
+        lat = rng.uniform(48, 50, args.points)
+        lon = rng.uniform(2, 4, args.points)
+
+        t0 = time.perf_counter()
+        heights = dem.elevation(lat, lon)
+        elapsed = time.perf_counter() - t0
+        error = np.max(np.abs(heights - plane(lat, lon)))
+        print(f"{args.points} points sur 4 tuiles {args.size}x{args.size} : {elapsed * 1000:.1f} ms "
+              f"({args.points / elapsed / 1e6:.1f} M points/s), écart max au plan {error:.2f} m")
+        assert error <= 0.5, f"écart {error:.2f} m"
+        assert len(dem._tiles) == 2
+
+        outside = dem.elevation([10.5], [10.5])
+        assert np.isnan(outside).all(), "une tuile absente doit donner NaN"
+
+        write_tile(directory, 48, 2, args.size, void=(0, 0))
+        dem = DEMTiles(directory)
+        assert np.isnan(dem.elevation([48.9999], [2.0001])).all(), "un pixel sans donnée doit donner NaN"
+        print("tuiles absentes et pixels sans donnée : NaN")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Débit d'encodage FIT contre TCX pour une même télémétrie : taille du fichier
+et points/s. Le bloc de records empaqueté par NumPy est comparé octet pour
+octet à un struct.pack par point, et le fichier complet est relu message par
+message (en-tête, définitions, CRC) par un décodeur minimal indépendant.
+
+    python -m benchmarks.fit_writer --points 3600 36000
+"""
+import argparse
+import struct
+import time
+from datetime import datetime
+import numpy as np
+from activities import create_fit, create_tcx
+from benchmarks.geodesy import synthetic_track
+from fit_writer import ACTIVITY, FIELDS, FITWriter, FORMATS, RECORD, SESSION, crc16
+from telemetry import synthesize_telemetry
+
+
+def struct_records(writer, telemetry):
+    """
+    Records packés un par un avec struct, mêmes conversions que `write_records`.
+    """
+    packer = struct.Struct("<B" + "".join(FORMATS[base] for _, base in FIELDS[RECORD]))
+    chunks = []
+    for t, lat, lon, alt, hr, dist, speed in zip(telemetry.elapsed_s.tolist(), telemetry.lat.tolist(),
+                                                  telemetry.lon.tolist(), telemetry.altitude.tolist(),
+                                                  telemetry.heart_rate.tolist(), telemetry.distance_m.tolist(),
+                                                  telemetry.speed_kmh.tolist()):
+        chunks.append(packer.pack(
+            2, writer.start + t,
+            int(np.round(lat * 2 ** 31 / 180)), int(np.round(lon * 2 ** 31 / 180)),
+            int(min(max(np.round((alt + 500) * 5), 0), 0xFFFE)), min(max(hr, 0), 0xFE),
+            int(np.round(dist * 100)), int(min(max(np.round(speed / 3.6 * 1000), 0), 0xFFFE)),
+        ))
+    return b"".join(chunks)
+
+
+# Types de base FIT -> format struct, pour la relecture
+BASE_FORMATS = {0x00: "B", 0x02: "B", 0x84: "H", 0x85: "i", 0x86: "I", 0x8C: "I"}
+
+
+def crc16_arc(data):
+    """
+    CRC-16/ARC bit à bit (polynôme réfléchi 0xA001), référence de relecture.
+    """
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def decode_fit(data):
+    """
+    Relit un fichier FIT : vérifie l'en-tête, sa taille de données et ses deux
+    CRC, puis décode chaque message selon la définition locale qui le précède.
+    Renvoie {numéro de message global: [{numéro de champ: valeur}, ...]}.
+    """
+    size, protocol, profile, data_size, magic, header_crc = struct.unpack_from("<BBHI4sH", data)
+    assert size == 14 and magic == b".FIT", "en-tête FIT invalide"
+    assert header_crc == crc16_arc(data[:12]), "CRC d'en-tête invalide"
+    assert len(data) == size + data_size + 2, "taille de données incohérente"
+    assert crc16_arc(data) == 0, "CRC de fichier invalide"
+
+    definitions = {}
+    messages = {}
+    offset, end = size, size + data_size
+    while offset < end:
+        header = data[offset]
+        offset += 1
+        assert not header & 0x80, "en-têtes compressés non produits par FITWriter"
+        local = header & 0x0F
+        if header & 0x40:
+            _, architecture, global_num, count = struct.unpack_from("<BBHB", data, offset)
+            assert architecture == 0, "petit-boutiste attendu"
+            offset += 5
+            fields = [struct.unpack_from("BBB", data, offset + 3 * k) for k in range(count)]
+            offset += 3 * count
+            for _, field_size, base in fields:
+                assert struct.calcsize(BASE_FORMATS[base]) == field_size
+            definitions[local] = (global_num, [num for num, _, _ in fields],
+                                  struct.Struct("<" + "".join(BASE_FORMATS[base] for _, _, base in fields)))
+        else:
+            global_num, numbers, packer = definitions[local]
+            messages.setdefault(global_num, []).append(dict(zip(numbers, packer.unpack_from(data, offset))))
+            offset += packer.size
+    assert offset == end
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, nargs="+", default=[3600, 36000])
+    args = parser.parse_args()
+
+    for n in args.points:
+        # ~3 m entre sommets à 10 km/h : environ un point par seconde
+        telemetry = synthesize_telemetry(synthetic_track(n), 10, 150, seed=0, start_time=datetime(2024, 1, 1))
+        n = len(telemetry.lat)
+
+        t0 = time.perf_counter()
+        tcx = create_tcx(telemetry, "Running").getvalue()
+        t_tcx = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        fit = create_fit(telemetry, "Running")
+        t_fit = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        crc16(fit)
+        t_crc = time.perf_counter() - t0
+
+        writer = FITWriter("Running", datetime(2024, 1, 1))
+        t0 = time.perf_counter()
+        reference = struct_records(writer, telemetry)
+        t_struct = time.perf_counter() - t0
+        writer.write_records(telemetry.elapsed_s, telemetry.lat, telemetry.lon, telemetry.altitude,
+                             telemetry.heart_rate, telemetry.distance_m, telemetry.speed_kmh)
+        assert writer._chunks[-1] == reference, "records NumPy différents de struct.pack"
+
+        messages = decode_fit(fit)
+        records = messages[RECORD]
+        assert len(records) == n
+        assert [r[253] - writer.start for r in records] == telemetry.elapsed_s.tolist()
+        assert np.allclose([r[0] * 180 / 2 ** 31 for r in records], telemetry.lat, atol=1e-7)
+        assert [r[3] for r in records] == telemetry.heart_rate.tolist()
+        assert len(messages[SESSION]) == len(messages[ACTIVITY]) == 1
+
+        print(f"{n:7d} points  TCX : {len(tcx) / 1e6:7.2f} Mo, {n / t_tcx / 1e3:7.0f} k points/s")
+        print(f"{n:7d} points  FIT : {len(fit) / 1e6:7.2f} Mo (x{len(tcx) / len(fit):.0f} plus petit), "
+              f"{n / t_fit / 1e3:7.0f} k points/s dont CRC {t_crc / t_fit:.0%} ; "
+              f"records struct.pack seuls : {n / t_struct / 1e3:.0f} k points/s")
+
+
+if __name__ == "__main__":
+    main()
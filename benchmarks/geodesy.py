@@ -0,0 +1,53 @@
+"""
+Noyau de distance vectorisé contre la boucle geopy de compute_total_distance_km :
+temps de calcul et écart maximal sur un tracé synthétique.
+
+    python -m benchmarks.geodesy --points 20000
+"""
+import argparse
+import time
+import numpy as np
+from geopy.distance import geodesic
+from geodesy import cumulative_distance
+
+# Bornes d'erreur relative documentées dans geodesy.py
+BOUNDS = {"haversine": 6e-3, "ellipsoidal": 1e-6}
+
+
+def synthetic_track(n, seed=0):
+    """
+    Marche aléatoire de pas ~15 m autour de Paris, en (lon, lat).
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.0001, size=(n, 2))
+    return np.array([2.3522, 48.8566]) + np.cumsum(steps, axis=0)
+
+
+def geopy_segments(coords):
+    return np.array([geodesic((coords[i - 1][1], coords[i - 1][0]), (coords[i][1], coords[i][0])).m
+                     for i in range(1, len(coords))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10000)
+    args = parser.parse_args()
+    coords = synthetic_track(args.points)
+
+    t0 = time.perf_counter()
+    reference = geopy_segments(coords)
+    t_geopy = time.perf_counter() - t0
+    print(f"geopy (boucle)   : {t_geopy * 1000:9.1f} ms, total {reference.sum() / 1000:.3f} km")
+
+    for method, bound in BOUNDS.items():
+        t0 = time.perf_counter()
+        segments, cumulative = cumulative_distance(coords, method)
+        elapsed = time.perf_counter() - t0
+        error = np.max(np.abs(segments - reference) / np.maximum(reference, 1e-9))
+        print(f"{method:17s}: {elapsed * 1000:9.3f} ms (x{t_geopy / elapsed:.0f}), "
+              f"total {cumulative[-1] / 1000:.3f} km, erreur relative max {error:.1e}")
+        assert error <= bound, f"{method} : erreur {error:.1e} au-delà de la borne {bound:.0e}"
+
+
+if __name__ == "__main__":
+    main()
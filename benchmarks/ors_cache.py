@@ -0,0 +1,72 @@
+"""
+Vérifie, contre un serveur ORS factice local, que les réponses en cache sont
+servies sans accès réseau.
+
+    python -m benchmarks.ors_cache
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from ors_client import ORSClient, RateLimiter
+from route_cache import RouteCache
+
+LATENCY_S = 0.3
+
+
+class StubORSHandler(BaseHTTPRequestHandler):
+    """
+    Répond comme /v2/directions/{profile}/geojson après LATENCY_S secondes.
+    """
+    protocol_version = "HTTP/1.1"
+    hits = 0
+
+    def do_POST(self):
+        StubORSHandler.hits += 1
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(LATENCY_S)
+        lon, lat = body["coordinates"][0]
+        seed = body["options"]["round_trip"]["seed"]
+        payload = json.dumps({"features": [{"geometry": {"coordinates": [
+            [lon, lat], [lon + 0.001 * seed, lat], [lon, lat]]}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubORSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "routes.sqlite")
+        client = ORSClient(cache=RouteCache(path), rate_limiter=RateLimiter(1000, 1))
+        client.url = f"http://127.0.0.1:{server.server_port}/v2/directions/{{profile}}/geojson"
+        seeds = [11, 22, 33]
+
+        for label in ("froid", "mémoire"):
+            t0 = time.perf_counter()
+            routes = client.round_trips(48.8566, 2.3522, 5, seeds)
+            print(f"Cache {label:8s}: {(time.perf_counter() - t0) * 1000:7.1f} ms, "
+                  f"requêtes serveur={StubORSHandler.hits}, routes={sum(bool(r) for r in routes)}")
+
+        # Nouveau processus simulé : mémoire vide, entrées relues depuis SQLite
+        client.cache = RouteCache(path)
+        t0 = time.perf_counter()
+        client.round_trips(48.8566, 2.3522, 5, seeds)
+        print(f"Cache {'disque':8s}: {(time.perf_counter() - t0) * 1000:7.1f} ms, "
+              f"requêtes serveur={StubORSHandler.hits}")
+
+    assert StubORSHandler.hits == len(seeds), "les réponses en cache ne doivent pas atteindre le serveur"
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
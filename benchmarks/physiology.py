@@ -0,0 +1,86 @@
+"""
+Modèle physiologique (vitesse ajustée à la pente, FC avec retard du premier
+ordre) contre la boucle point par point d'origine, en points/s sur un tracé
+vallonné synthétique. La récurrence `lfilter` est aussi comparée à la même
+récurrence écrite en Python pur.
+
+    python -m benchmarks.physiology --points 50000
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks.geodesy import synthetic_track
+from physiology import HR_START, HR_REST_BPM, HR_TAU_S, heart_rate_response
+from telemetry import synthesize_telemetry
+
+
+def legacy_loop(coords, avg_speed_kmh, hr_avg):
+    """
+    Boucle des anciens create_tcx : un tirage de vitesse et de FC par point.
+    """
+    avg_speed_mps = avg_speed_kmh / 3.6
+    speeds, hrs = [], []
+    for i in range(len(coords)):
+        factor = 1 + 0.1 * np.sin(i / 10) + np.random.normal(0, 0.05)
+        speeds.append(avg_speed_mps * factor * 3.6)
+        hrs.append(hr_avg + np.random.normal(0, 5))
+    return speeds, hrs
+
+
+def python_response(vertex_s, effort, hr_avg):
+    """
+    Même récurrence que `heart_rate_response`, seconde par seconde en Python.
+    """
+    alpha = 1 - np.exp(-1.0 / HR_TAU_S)
+    hr = HR_REST_BPM + HR_START * (hr_avg - HR_REST_BPM)
+    grid, segment = [], 0
+    for t in range(int(np.ceil(vertex_s[-1])) + 1):
+        while segment + 1 < len(effort) and vertex_s[segment + 1] <= t:
+            segment += 1
+        hr += alpha * (HR_REST_BPM + (hr_avg - HR_REST_BPM) * effort[segment] - hr)
+        grid.append(hr)
+    return np.interp(vertex_s, np.arange(len(grid)), grid)
+
+
+def rate(n, elapsed):
+    return f"{elapsed * 1000:8.1f} ms, {n / elapsed / 1e6:6.2f} M points/s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=50000)
+    args = parser.parse_args()
+    coords = synthetic_track(args.points)
+    n = len(coords)
+
+    t0 = time.perf_counter()
+    legacy_loop(coords, 10, 150)
+    t_loop = time.perf_counter() - t0
+    print(f"boucle d'origine          : {rate(n, t_loop)}")
+
+    rng = np.random.default_rng(0)
+    vertex_s = np.concatenate(([0.0], np.cumsum(rng.uniform(1, 6, n - 1))))
+    effort = 1 + 0.1 * rng.standard_normal(n - 1)
+    t0 = time.perf_counter()
+    reference = python_response(vertex_s, effort, 150)
+    t_python = time.perf_counter() - t0
+    heart_rate_response(vertex_s[:2], effort[:1], 150)  # import de scipy.signal hors mesure
+    t0 = time.perf_counter()
+    response = heart_rate_response(vertex_s, effort, 150)
+    t_filter = time.perf_counter() - t0
+    error = np.max(np.abs(response - reference))
+    print(f"FC, récurrence Python     : {rate(n, t_python)}")
+    print(f"FC, lfilter               : {rate(n, t_filter)} (x{t_python / t_filter:.0f}), écart {error:.1e} bpm")
+    assert error < 1e-6
+
+    for interval_s in (None, 1):
+        t0 = time.perf_counter()
+        telemetry = synthesize_telemetry(coords, 10, 150, seed=0, interval_s=interval_s)
+        elapsed = time.perf_counter() - t0
+        label = "par sommet" if interval_s is None else f"toutes les {interval_s} s"
+        print(f"synthesize_telemetry ({label}) : {len(telemetry.lat)} points produits, "
+              f"{rate(len(telemetry.lat), elapsed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Simplification des tracés affichés par Folium : taille du HTML de la carte et
+temps de rendu avec le tracé complet puis avec `lod_points`, pour plusieurs
+niveaux de zoom.
+
+    python -m benchmarks.polyline --points 20000 --zooms 13 15 17
+"""
+import argparse
+import time
+import folium
+import numpy as np
+from polyline import METERS_PER_DEG_LAT, lod_points, tolerance_for_zoom
+
+
+def synthetic_route(n, seed=0):
+    """
+    Tracé de type voirie autour de Paris, en (lat, lon) : segments rectilignes
+    de 50 à 300 m échantillonnés tous les ~3 m, avec ±0,5 m de bruit GPS.
+    """
+    rng = np.random.default_rng(seed)
+    legs = []
+    heading = 0.0
+    while sum(len(leg) for leg in legs) < n:
+        heading += rng.uniform(-np.pi / 2, np.pi / 2)
+        steps = int(rng.uniform(50, 300) / 3)
+        legs.append(np.tile([np.cos(heading), np.sin(heading)], (steps, 1)) * 3.0)
+    xy = np.cumsum(np.concatenate(legs)[:n], axis=0) + rng.normal(0, 0.5, size=(n, 2))
+    lat0 = 48.8566
+    lat = lat0 + xy[:, 1] / METERS_PER_DEG_LAT
+    lon = 2.3522 + xy[:, 0] / (METERS_PER_DEG_LAT * np.cos(np.radians(lat0)))
+    return np.column_stack((lat, lon))
+
+
+def max_deviation(points, simplified):
+    """
+    Écart maximal (m) entre les points d'origine et le tracé simplifié.
+    """
+    cos_lat = np.cos(np.radians(points[:, 0].mean()))
+
+    def project(p):
+        return np.column_stack((p[:, 1] * cos_lat, p[:, 0])) * METERS_PER_DEG_LAT
+
+    xy, kept = project(points), project(simplified)
+    nearest = np.full(len(xy), np.inf)
+    for a, b in zip(kept[:-1], kept[1:]):
+        seg = b - a
+        rel = xy - a
+        t = np.clip(rel @ seg / max(seg @ seg, 1e-12), 0, 1)
+        nearest = np.minimum(nearest, np.hypot(*(rel - t[:, None] * seg).T))
+    return float(nearest.max())
+
+
+def render(points, zoom):
+    t0 = time.perf_counter()
+    m = folium.Map(location=points[0], zoom_start=zoom)
+    folium.PolyLine(points, color="blue", weight=5, opacity=0.7).add_to(m)
+    html = m.get_root().render()
+    return len(html.encode("utf-8")), time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--zooms", type=int, nargs="+", default=[13, 15, 17])
+    args = parser.parse_args()
+    route = synthetic_route(args.points)
+
+    size, elapsed = render(route.tolist(), args.zooms[0])
+    print(f"tracé complet : {len(route):6d} points, {size / 1024:8.1f} Kio, rendu {elapsed * 1000:7.1f} ms")
+    for zoom in args.zooms:
+        tolerance = tolerance_for_zoom(zoom, route[0, 0])
+        t0 = time.perf_counter()
+        simplified = lod_points(route, zoom)
+        t_simplify = time.perf_counter() - t0
+        lod_size, lod_elapsed = render(simplified, zoom)
+        deviation = max_deviation(route, np.asarray(simplified))
+        print(f"zoom {zoom:2d} ({tolerance:5.2f} m) : {len(simplified):6d} points, {lod_size / 1024:8.1f} Kio "
+              f"(x{size / lod_size:.0f}), simplification {t_simplify * 1000:6.1f} ms + rendu "
+              f"{lod_elapsed * 1000:6.1f} ms, écart max {deviation:.2f} m")
+        assert deviation <= tolerance + 1e-6, f"écart {deviation:.2f} m au-delà de la tolérance {tolerance:.2f} m"
+
+
+if __name__ == "__main__":
+    main()
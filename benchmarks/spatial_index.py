@@ -0,0 +1,71 @@
+"""
+Index spatial des nœuds : construction, puis latence d'une requête isolée (un
+clic sur la carte) de plus proche nœud, de disque et de couronne, contre un
+parcours de tous les nœuds ; nombre de points de passage possibles retenus par find_loops.
+
+    python -m benchmarks.spatial_index --size 300 --target-km 5
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks.compact_graph import synthetic_graph, timed
+from compact_graph import CompactGraph
+from loop_engine import ShortestPathTree, candidate_nodes
+from spatial_index import SpatialIndex
+
+
+def brute_annulus(graph, lat, lon, r1, r2):
+    cos_lat = np.cos(np.radians(graph.spatial_index.ref_lat))
+    d = np.hypot((graph.lon - lon) * cos_lat, graph.lat - lat) * 111320.0
+    return np.flatnonzero((d >= r1) & (d <= r2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=300, help="côté de la grille synthétique")
+    parser.add_argument("--target-km", type=float, default=5)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    graph = CompactGraph.from_networkx(synthetic_graph(args.size))
+    t_build, index = timed(lambda: graph.spatial_index, 1)
+    print(f"Graphe : {len(graph)} nœuds ; construction de l'index {t_build * 1000:.1f} ms")
+
+    rng = np.random.default_rng(0)
+    points = np.column_stack((rng.uniform(graph.lat.min(), graph.lat.max(), args.queries),
+                              rng.uniform(graph.lon.min(), graph.lon.max(), args.queries)))
+    everything = np.ones(len(graph), dtype=bool)
+
+    t0 = time.perf_counter()
+    found = [int(index.nearest(lat, lon)[0]) for lat, lon in points]
+    t_index = (time.perf_counter() - t0) / args.queries
+    t0 = time.perf_counter()
+    reference = [int(graph.nearest(lat, lon, mask=everything)[0]) for lat, lon in points]
+    t_brute = (time.perf_counter() - t0) / args.queries
+    print(f"plus proche nœud : index {t_index * 1e6:7.1f} µs, parcours complet {t_brute * 1e6:7.1f} µs, "
+          f"{np.mean(np.equal(found, reference)):.1%} de résultats identiques")
+
+    lat, lon = graph.lat.mean(), graph.lon.mean()
+    r1, r2 = 300.0, 1500.0
+    t_disc, disc = timed(lambda: index.within(lat, lon, r2), 20)
+    t_brute, expected = timed(lambda: brute_annulus(graph, lat, lon, 0.0, r2), 20)
+    assert np.array_equal(disc, expected)
+    assert len(SpatialIndex([], []).within(lat, lon, r2)) == 0
+    print(f"disque {r2:.0f} m ({len(disc)} nœuds) : index {t_disc * 1e6:7.1f} µs, "
+          f"parcours complet {t_brute * 1e6:7.1f} µs")
+
+    t_ring, ring = timed(lambda: index.annulus(lat, lon, r1, r2), 20)
+    t_brute, expected = timed(lambda: brute_annulus(graph, lat, lon, r1, r2), 20)
+    assert np.array_equal(ring, expected)
+    print(f"couronne {r1:.0f}-{r2:.0f} m ({len(ring)} nœuds) : index {t_ring * 1e6:7.1f} µs, "
+          f"parcours complet {t_brute * 1e6:7.1f} µs")
+
+    start = int(graph.nearest(lat, lon)[0])
+    tree = ShortestPathTree(graph, start)
+    t_candidates, candidates = timed(lambda: candidate_nodes(graph, tree, tree, args.target_km * 1000, 0.1), 5)
+    print(f"points de passage possibles pour {args.target_km} km : {len(candidates)} nœuds sur {len(graph)} "
+          f"({t_candidates * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
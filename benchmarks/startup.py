@@ -0,0 +1,69 @@
+"""
+Temps de démarrage de chaque point d'entrée : exécution à froid dans un
+interpréteur neuf (démarrage du conteneur) puis à chaud dans le même processus
+(réexécution Streamlit, modules déjà importés). Indique aussi quelles
+dépendances lourdes ont été chargées au démarrage.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup test6.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["test.py", "test2.py", "test4.py", "test5.py", "test6.py", "batch_generate.py"]
+HEAVY = ["matplotlib", "osmnx", "geopy", "scipy", "networkx", "gpxpy", "pandas"]
+
+# Exécuté dans un sous-processus : Streamlit tourne en mode « bare », les
+# widgets renvoient leur valeur par défaut et aucun bouton n'est cliqué.
+HARNESS = """
+import json, logging, runpy, sys, time
+logging.disable(logging.CRITICAL)
+sys.argv = [{script!r}, "--help"] if {script!r} == "batch_generate.py" else [{script!r}]
+def run():
+    t0 = time.perf_counter()
+    try:
+        runpy.run_path({script!r}, run_name="__main__")
+    except SystemExit:
+        pass
+    return time.perf_counter() - t0
+cold = run()
+warm = run()
+print(json.dumps({{"cold": cold, "warm": warm,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(script, repeat):
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", HARNESS.format(script=script, heavy=HEAVY)],
+                                cwd=ROOT, capture_output=True, text=True, check=True)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return (statistics.median(r["cold"] for r in runs),
+            statistics.median(r["warm"] for r in runs),
+            runs[-1]["heavy"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scripts", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    header = "point d'entrée"
+    print(f"{header:18s} {'froid':>9s} {'chaud':>9s}  dépendances lourdes chargées")
+    for script in args.scripts:
+        try:
+            cold, warm, heavy = measure(script, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{script:18s} échec : {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        print(f"{script:18s} {cold * 1000:7.0f}ms {warm * 1000:7.0f}ms  {', '.join(heavy) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Pic mémoire et temps d'écriture : ElementTree contre TCXWriter en flux
+(`write_trackpoints`, le chemin de `create_tcx`), pour des activités de durée
+croissante à 1 Hz. Les tableaux de la télémétrie existent déjà avant
+l'écriture : ils ne sont pas comptés dans le pic.
+
+    python -m benchmarks.tcx_writer --points 3600 36000 180000
+"""
+import argparse
+import os
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+import numpy as np
+from tcx_writer import NSMAP, TCXWriter
+
+
+def write_elementtree(out, n, columns):
+    start = datetime.now()
+    tcx = ET.Element('TrainingCenterDatabase', xmlns=NSMAP)
+    activity = ET.SubElement(ET.SubElement(tcx, 'Activities'), 'Activity', Sport="Running")
+    ET.SubElement(activity, 'Id').text = start.isoformat()
+    lap = ET.SubElement(activity, 'Lap', StartTime=start.isoformat())
+    track = ET.SubElement(lap, 'Track')
+    for time_, lat, lon, altitude, heart_rate in zip(*(c.tolist() for c in columns)):
+        tp = ET.SubElement(track, 'Trackpoint')
+        ET.SubElement(tp, 'Time').text = time_
+        pos = ET.SubElement(tp, 'Position')
+        ET.SubElement(pos, 'LatitudeDegrees').text = str(lat)
+        ET.SubElement(pos, 'LongitudeDegrees').text = str(lon)
+        ET.SubElement(tp, 'AltitudeMeters').text = str(altitude)
+        ET.SubElement(ET.SubElement(tp, 'HeartRateBpm'), 'Value').text = str(heart_rate)
+    ET.SubElement(lap, 'TotalTimeSeconds').text = str(n)
+    ET.SubElement(lap, 'DistanceMeters').text = str(n * 3)
+    ET.SubElement(lap, 'Calories').text = str(500)
+    ET.ElementTree(tcx).write(out, encoding='utf-8', xml_declaration=True)
+
+
+def telemetry_columns(n):
+    """
+    Colonnes d'une télémétrie de `n` points, comme `telemetry.synthesize_telemetry`.
+    """
+    start = np.datetime64(datetime.now(), "us")
+    times = np.datetime_as_string(start + np.arange(n).astype("timedelta64[s]"), unit="us")
+    offsets = np.arange(n) * 1e-6
+    return times, 48.85 + offsets, 2.35 + offsets, np.full(n, 200.0), np.full(n, 140, dtype=np.int64)
+
+
+def write_streaming(out, n, columns):
+    writer = TCXWriter(out, "Running", datetime.now())
+    writer.write_trackpoints(*columns)
+    writer.close(n, n * 3, 500)
+
+
+def measure(fn, n):
+    columns = telemetry_columns(n)
+    with open(os.devnull, "wb") as out:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn(out, n, columns)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, nargs="+", default=[3600, 36000, 108000])
+    args = parser.parse_args()
+    for n in args.points:
+        for name, fn in (("ElementTree", write_elementtree), ("TCXWriter", write_streaming)):
+            elapsed, peak = measure(fn, n)
+            print(f"{n:>7} points  {name:12s}: {elapsed:6.2f} s, pic mémoire {peak / 1e6:7.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Grands parcours sur une grille synthétique découpée en mailles (hors ligne) :
+mailles chargées par l'expansion du front autour du départ contre graphe
+complet de la région, puis recherche des boucles avec et sans repères ALT
+(résultats identiques, et identiques à ceux du graphe complet).
+
+    python -m benchmarks.tiled_graph --size 1000 --distance-km 60
+"""
+import argparse
+import numpy as np
+from benchmarks.compact_graph import timed
+from compact_graph import CompactGraph
+from graph_cache import GRID_DEG
+from loop_engine import find_loops
+from tiled_graph import TileSet, search_nbytes
+
+
+def synthetic_edges(size, seed=0, drop=0.25):
+    """
+    Grille size × size (~100 m entre intersections) dont une part `drop` des
+    rues est retirée, en tableaux `CompactGraph.from_edges` (arêtes dans les deux sens).
+    """
+    rng = np.random.default_rng(seed)
+    i, j = np.divmod(np.arange(size * size), size)
+    lat = 48.5 + i * 0.0009
+    lon = 2.0 + j * 0.0013
+    grid = np.arange(size * size).reshape(size, size)
+    u = np.concatenate((grid[:, :-1].ravel(), grid[:-1, :].ravel()))
+    v = np.concatenate((grid[:, 1:].ravel(), grid[1:, :].ravel()))
+    keep = rng.random(len(u)) >= drop
+    u, v = u[keep], v[keep]
+    length = 90 + 20 * rng.random(len(u))
+    return np.arange(size * size), lat, lon, np.concatenate((u, v)), np.concatenate((v, u)), np.tile(length, 2)
+
+
+def tile_loader(edges, loaded):
+    """
+    Équivalent hors ligne de `graph_cache.load_grid_tile` (truncate_by_edge) :
+    arêtes dont au moins une extrémité est dans la maille ; celles qui
+    franchissent un bord sont donc présentes dans les deux mailles voisines.
+    """
+    node_ids, lat, lon, src, dst, length = edges
+    rows = np.floor(lat / GRID_DEG).astype(np.int64)
+    cols = np.floor(lon / GRID_DEG).astype(np.int64)
+
+    def load(key, network_type):
+        loaded.append(key)
+        in_cell = (rows == key[0]) & (cols == key[1])
+        inside = in_cell[src] | in_cell[dst]
+        nodes = np.unique(np.concatenate((np.flatnonzero(in_cell), src[inside], dst[inside])))
+        return node_ids[nodes], lat[nodes], lon[nodes], src[inside], dst[inside], length[inside]
+    return load
+
+
+def same_loops(graph_a, loops_a, graph_b, loops_b):
+    return len(loops_a) == len(loops_b) and all(
+        np.array_equal(graph_a.node_ids[a], graph_b.node_ids[b]) for (a, _), (b, _) in zip(loops_a, loops_b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="côté de la grille synthétique")
+    parser.add_argument("--distance-km", type=float, default=60)
+    parser.add_argument("--budget-mb", type=float, default=512)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args()
+
+    edges = synthetic_edges(args.size)
+    full = CompactGraph.from_edges(*edges)
+    lat, lon = full.lat.mean(), full.lon.mean()
+    radius = 1.1 * args.distance_km * 500
+    print(f"Région : {len(full)} nœuds, {len(full.lengths)} arêtes, mailles de {GRID_DEG}°")
+
+    loaded = []
+    tiles = TileSet(budget_mb=args.budget_mb, loader=tile_loader(edges, loaded))
+    t_stitch, graph = timed(lambda: tiles.graph_around(lat, lon, radius), 1)
+    size_mb = sum(column.nbytes for key in set(loaded) for column in tiles.tile(key)) / 1e6
+    print(f"Mailles chargées par le front : {len(set(loaded))} ({size_mb:.0f} Mo), {len(graph)} nœuds "
+          f"({len(graph) / len(full):.0%} de la région) en {t_stitch:.2f} s")
+
+    t_landmarks, landmarks = timed(lambda: graph.landmarks, 1)
+    print(f"Prétraitement ALT : {len(landmarks.nodes)} repères en {t_landmarks:.2f} s, "
+          f"{landmarks.nbytes / 1e6:.0f} Mo")
+
+    start_full = int(full.nearest(lat, lon)[0])
+    start = int(graph.nearest(lat, lon)[0])
+    totals = [0.0, 0.0]
+    for seed in range(args.seeds):
+        reference = find_loops(full, start_full, args.distance_km * 1000, seed=seed)
+        t_plain, plain = timed(lambda: find_loops(graph, start, args.distance_km * 1000, seed=seed), 1)
+        t_alt, alt = timed(lambda: find_loops(graph, start, args.distance_km * 1000, seed=seed,
+                                              landmarks=landmarks), 1)
+        assert same_loops(graph, plain, graph, alt)
+        identical = same_loops(full, reference, graph, alt)
+        totals[0] += t_plain
+        totals[1] += t_alt
+        print(f"graine {seed} : {len(alt)} boucles ({', '.join(f'{length / 1000:.1f}' for _, length in alt)} km), "
+              f"sans repères {t_plain:.2f} s, avec repères {t_alt:.2f} s, "
+              f"{'identiques à' if identical else 'différentes de'} celles du graphe complet")
+    print(f"Total : sans repères {totals[0]:.2f} s, avec repères {totals[1]:.2f} s (x{totals[0] / totals[1]:.1f})")
+
+    # Toutes les structures de recherche sont construites : la mémoire réelle
+    # reste sous l'estimation et sous le budget
+    kept_mb = sum(column.nbytes for edges in tiles._tiles.values() for column in edges) / 1e6
+    estimate = search_nbytes(len(graph), len(graph.lengths))
+    print(f"Mémoire : mailles gardées {kept_mb:.0f} Mo + graphe et repères {graph.nbytes / 1e6:.0f} Mo "
+          f"(estimation {estimate / 1e6:.0f} Mo), budget {args.budget_mb:.0f} Mo")
+    assert graph.nbytes <= estimate
+    assert kept_mb * 1e6 + graph.nbytes <= args.budget_mb * 1e6
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import numpy as np
+
+# Longueur minimale d'une arête : csgraph ignore les poids nuls explicites
+MIN_EDGE_LENGTH = 1e-3
+
+
+def networkx_edges(G):
+    """
+    Tableaux (identifiants, lat, lon des nœuds ; source, cible, longueur des
+    arêtes) d'un graphe networkx/osmnx, tels qu'attendus par
+    `CompactGraph.from_edges`.
+    """
+    node_ids = np.fromiter(G.nodes, dtype=np.int64, count=len(G))
+    lat = np.array([G.nodes[n]['y'] for n in node_ids], dtype=np.float64)
+    lon = np.array([G.nodes[n]['x'] for n in node_ids], dtype=np.float64)
+    src, dst, length = [], [], []
+    for u, v, d in G.edges(data=True):
+        src.append(u)
+        dst.append(v)
+        length.append(d.get('length', 0.0))
+    return (node_ids, lat, lon, np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64),
+            np.asarray(length, dtype=np.float64))
+
+
+class CompactGraph:
+    """
+    Graphe routier au format CSR : identifiants OSM, latitudes et longitudes en
+    tableaux float, puis décalages, cibles et longueurs des arêtes.
+    Les nœuds sont désignés par leur indice dans ces tableaux.
+    """
+
+    def __init__(self, node_ids, lat, lon, offsets, targets, lengths):
+        self.node_ids = node_ids
+        self.lat = lat
+        self.lon = lon
+        self.offsets = offsets
+        self.targets = targets
+        self.lengths = lengths
+        self._matrix = None
+        self._matrix_t = None
+        self._spatial_index = None
+        self._landmarks = None
+
+    @classmethod
+    def from_networkx(cls, G):
+        """
+        Conversion unique d'un graphe networkx/osmnx ; seule l'arête parallèle la
+        plus courte est conservée entre deux nœuds.
+        """
+        return cls.from_edges(*networkx_edges(G))
+
+    @classmethod
+    def from_edges(cls, node_ids, lat, lon, src, dst, length):
+        """
+        Construction depuis des tableaux : nœuds (identifiants OSM, lat, lon) et
+        arêtes (identifiants OSM de la source et de la cible, longueur). Un nœud
+        présent plusieurs fois n'est gardé qu'une fois, ce qui permet de recoudre
+        des tuiles voisines en concaténant leurs tableaux.
+        """
+        node_ids, first = np.unique(np.asarray(node_ids, dtype=np.int64), return_index=True)
+        lat = np.asarray(lat, dtype=np.float64)[first]
+        lon = np.asarray(lon, dtype=np.float64)[first]
+        src = np.searchsorted(node_ids, np.asarray(src, dtype=np.int64))
+        dst = np.searchsorted(node_ids, np.asarray(dst, dtype=np.int64))
+        length = np.maximum(np.asarray(length, dtype=np.float64), MIN_EDGE_LENGTH)
+
+        # Tri par (source, cible, longueur) puis dédoublonnage : la plus courte reste
+        order = np.lexsort((length, dst, src))
+        src, dst, length = src[order], dst[order], length[order]
+        keep = np.ones(len(src), dtype=bool)
+        keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst, length = src[keep], dst[keep], length[keep]
+
+        offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.add.at(offsets, src + 1, 1)
+        np.cumsum(offsets, out=offsets)
+        return cls(node_ids, lat, lon, offsets, dst.astype(np.int32), length)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def matrix(self):
+        if self._matrix is None:
+            from scipy.sparse import csr_matrix
+
+            n = len(self)
+            self._matrix = csr_matrix((self.lengths, self.targets, self.offsets), shape=(n, n))
+        return self._matrix
+
+    @property
+    def matrix_t(self):
+        """
+        Matrice transposée, pour les recherches sur le graphe inversé.
+        """
+        if self._matrix_t is None:
+            self._matrix_t = self.matrix.T.tocsr()
+        return self._matrix_t
+
+    @property
+    def spatial_index(self):
+        """
+        Index k-d des nœuds (voir spatial_index.py), construit au premier usage.
+        """
+        if self._spatial_index is None:
+            from spatial_index import SpatialIndex
+
+            self._spatial_index = SpatialIndex(self.lat, self.lon)
+        return self._spatial_index
+
+    @property
+    def landmarks(self):
+        """
+        Repères ALT (voir landmarks.py), calculés au premier usage.
+        """
+        if self._landmarks is None:
+            from landmarks import Landmarks
+
+            self._landmarks = Landmarks(self)
+        return self._landmarks
+
+    @property
+    def nbytes(self):
+        """
+        Mémoire occupée par le graphe et par les structures déjà construites
+        (matrices, index k-d, repères).
+        """
+        total = sum(a.nbytes for a in (self.node_ids, self.lat, self.lon, self.offsets, self.targets, self.lengths))
+        for matrix in (self._matrix, self._matrix_t):
+            if matrix is not None:
+                total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        if self._spatial_index is not None:
+            total += self._spatial_index.nbytes
+        if self._landmarks is not None:
+            total += self._landmarks.nbytes
+        return total
+
+    def indices_of(self, node_ids):
+        """
+        Indices des nœuds d'identifiants OSM `node_ids`, -1 pour ceux absents du graphe.
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        position = np.searchsorted(self.node_ids, node_ids)
+        found = position < len(self.node_ids)
+        found[found] = self.node_ids[position[found]] == node_ids[found]
+        return np.where(found, position, -1)
+
+    def index_of(self, node_id):
+        """
+        Indice du nœud d'identifiant OSM `node_id` ; KeyError s'il est absent.
+        """
+        index = int(self.indices_of([node_id])[0])
+        if index < 0:
+            raise KeyError(node_id)
+        return index
+
+    def is_symmetric(self):
+        """
+        Vrai si chaque arête u→v a une arête v→u de même longueur.
+        """
+        return (self.matrix != self.matrix_t).nnz == 0
+
+    def dijkstra(self, root, reverse=False, limit=np.inf):
+        """
+        Distances et prédécesseurs depuis `root` (vers `root` si `reverse`).
+        `root` peut être une liste d'indices : une ligne par racine est renvoyée.
+        La recherche s'arrête au-delà de `limit` mètres ; les nœuds inaccessibles
+        ont une distance infinie et un prédécesseur < 0.
+        """
+        from scipy.sparse.csgraph import dijkstra
+
+        matrix = self.matrix_t if reverse else self.matrix
+        return dijkstra(matrix, directed=True, indices=root, return_predecessors=True, limit=limit)
+
+    def nearest(self, lat, lon, mask=None):
+        """
+        Indice du nœud le plus proche de chaque point (lat, lon), parmi les nœuds
+        de `mask` si fourni (projection équirectangulaire locale). Sans masque,
+        la recherche passe par `spatial_index`.
+        """
+        if mask is None:
+            return self.spatial_index.nearest(lat, lon)
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        candidates = np.flatnonzero(mask)
+        cos_lat = np.cos(np.radians(lat))[:, None]
+        dy = self.lat[candidates][None, :] - lat[:, None]
+        dx = (self.lon[candidates][None, :] - lon[:, None]) * cos_lat
+        return candidates[np.argmin(dx * dx + dy * dy, axis=1)]
+
+    def coords(self, path):
+        """
+        Coordonnées (lat, lon) d'une suite d'indices de nœuds, tableau (N, 2).
+        """
+        path = np.asarray(path)
+        return np.column_stack((self.lat[path], self.lon[path]))
+
+    def path_length(self, path):
+        """
+        Longueur d'un chemin en mètres, lue dans la matrice d'adjacence.
+        """
+        path = np.asarray(path)
+        if len(path) < 2:
+            return 0.0
+        return float(np.asarray(self.matrix[path[:-1], path[1:]]).sum())
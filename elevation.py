@@ -0,0 +1,100 @@
+import logging
+import os
+from collections import OrderedDict
+import numpy as np
+
+# Modèle numérique de terrain hors ligne : tuiles SRTM .hgt (1° x 1°, entiers
+# 16 bits gros-boutistes, première ligne au nord) lues par memory-mapping.
+DEM_DIR = os.environ.get("TCX_DEM_DIR", "dem")
+DEM_OPEN_TILES = int(os.environ.get("TCX_DEM_TILES", "16"))
+VOID = -32768  # valeur SRTM des pixels sans donnée
+
+
+def tile_name(lat_floor, lon_floor):
+    """
+    Nom SRTM de la tuile dont le coin sud-ouest est (lat_floor, lon_floor), ex. N48E002.
+    """
+    return (f"{'N' if lat_floor >= 0 else 'S'}{abs(lat_floor):02d}"
+            f"{'E' if lon_floor >= 0 else 'W'}{abs(lon_floor):03d}.hgt")
+
+
+class DEMTiles:
+    """
+    Altitudes interpolées depuis un répertoire de tuiles .hgt (SRTM1 3601 x 3601
+    ou SRTM3 1201 x 1201). Au plus `max_open` tuiles restent ouvertes, les moins
+    récemment utilisées sont fermées d'abord.
+    """
+
+    def __init__(self, directory=DEM_DIR, max_open=DEM_OPEN_TILES):
+        self.directory = directory
+        self.max_open = max_open
+        self._tiles = OrderedDict()
+
+    def _tile(self, lat_floor, lon_floor):
+        key = (lat_floor, lon_floor)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+        path = os.path.join(self.directory, tile_name(lat_floor, lon_floor))
+        tile = None
+        if os.path.exists(path):
+            size = int(round(np.sqrt(os.path.getsize(path) / 2)))
+            tile = np.memmap(path, dtype=">i2", mode="r", shape=(size, size))
+        else:
+            logging.warning("Tuile d'altitude absente : %s", path)
+        self._tiles[key] = tile
+        while len(self._tiles) > self.max_open:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def elevation(self, lat, lon):
+        """
+        Altitude (m) par interpolation bilinéaire, pour des tableaux de points
+        en un seul appel par tuile ; NaN hors des tuiles disponibles ou sur un
+        pixel sans donnée.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        result = np.full(lat.shape, np.nan)
+        lat_floor = np.floor(lat).astype(np.int64)
+        lon_floor = np.floor(lon).astype(np.int64)
+        # Points regroupés par tuile : un tri, puis une tranche contiguë par tuile
+        key = ((lat_floor + 90) * 360 + (lon_floor + 180)).ravel()
+        order = np.argsort(key, kind="stable")
+        keys, starts = np.unique(key[order], return_index=True)
+        flat = result.reshape(-1)
+        for k, start, stop in zip(keys.tolist(), starts.tolist(), [*starts[1:].tolist(), len(order)]):
+            lat0, lon0 = k // 360 - 90, k % 360 - 180
+            tile = self._tile(lat0, lon0)
+            if tile is None:
+                continue
+            index = order[start:stop]
+            last = tile.shape[0] - 1
+            row = (lat0 + 1 - lat.reshape(-1)[index]) * last
+            col = (lon.reshape(-1)[index] - lon0) * last
+            r0 = np.clip(np.floor(row).astype(np.int64), 0, last - 1)
+            c0 = np.clip(np.floor(col).astype(np.int64), 0, last - 1)
+            fr = row - r0
+            fc = col - c0
+            corners = np.stack((tile[r0, c0], tile[r0, c0 + 1], tile[r0 + 1, c0], tile[r0 + 1, c0 + 1]))
+            corners = np.where(corners == VOID, np.nan, corners.astype(np.float64))
+            flat[index] = ((corners[0] * (1 - fc) + corners[1] * fc) * (1 - fr)
+                           + (corners[2] * (1 - fc) + corners[3] * fc) * fr)
+        return result
+
+    def __call__(self, lat, lon):
+        return self.elevation(lat, lon)
+
+
+_dem = None
+
+
+def get_dem():
+    """
+    Fournisseur d'altitude du processus, ou None si TCX_DEM_DIR n'existe pas
+    (les activités gardent alors leur profil d'altitude synthétique).
+    """
+    global _dem
+    if _dem is None and os.path.isdir(DEM_DIR):
+        _dem = DEMTiles()
+    return _dem
@@ -0,0 +1,170 @@
+import struct
+from datetime import datetime
+import numpy as np
+
+# Encodeur FIT (Garmin Flexible and Interoperable Data Transfer) : en-tête de
+# 14 octets, messages de définition puis de données (petit-boutiste), CRC-16
+# final. Les Trackpoints sont empaquetés en un seul tableau structuré NumPy,
+# octet pour octet identique à un struct.pack par point.
+
+PROTOCOL_VERSION = 0x20
+PROFILE_VERSION = 2132
+FIT_EPOCH = 631065600  # 1989-12-31T00:00:00Z en secondes Unix
+SEMICIRCLES_PER_DEG = 2 ** 31 / 180
+
+# Types de base FIT
+ENUM, UINT8, UINT16, SINT32, UINT32, UINT32Z = 0x00, 0x02, 0x84, 0x85, 0x86, 0x8C
+
+# Numéros de message globaux
+FILE_ID, SESSION, LAP, RECORD, EVENT, ACTIVITY = 0, 18, 19, 20, 21, 34
+
+SPORTS = {"Running": 1, "Biking": 2, "Walking": 11}
+MANUFACTURER_DEVELOPMENT = 255
+
+# Numéro de message local de chaque message, fixe pour tout le fichier
+LOCAL = {FILE_ID: 0, EVENT: 1, RECORD: 2, LAP: 3, SESSION: 4, ACTIVITY: 5}
+
+# (numéro de champ, type de base) par message ; l'ordre fixe celui des valeurs
+FIELDS = {
+    FILE_ID: [(0, ENUM), (1, UINT16), (2, UINT16), (3, UINT32Z), (4, UINT32)],
+    EVENT: [(253, UINT32), (0, ENUM), (1, ENUM)],
+    RECORD: [(253, UINT32), (0, SINT32), (1, SINT32), (2, UINT16), (3, UINT8), (5, UINT32), (6, UINT16)],
+    LAP: [(253, UINT32), (2, UINT32), (7, UINT32), (8, UINT32), (9, UINT32), (11, UINT16), (25, ENUM),
+          (0, ENUM), (1, ENUM)],
+    SESSION: [(253, UINT32), (2, UINT32), (7, UINT32), (8, UINT32), (9, UINT32), (11, UINT16), (5, ENUM),
+              (25, UINT16), (26, UINT16), (0, ENUM), (1, ENUM)],
+    ACTIVITY: [(253, UINT32), (0, UINT32), (1, UINT16), (2, ENUM), (3, ENUM), (4, ENUM)],
+}
+FORMATS = {ENUM: "B", UINT8: "B", UINT16: "H", SINT32: "i", UINT32: "I", UINT32Z: "I"}
+SIZES = {code: struct.calcsize(fmt) for code, fmt in FORMATS.items()}
+
+# Événements : timer start / stop_all, fin de tour, de session, d'activité
+EVENT_TIMER, EVENT_LAP, EVENT_SESSION, EVENT_ACTIVITY = 0, 9, 8, 26
+EVENT_START, EVENT_STOP, EVENT_STOP_ALL = 0, 1, 4
+
+RECORD_DTYPE = np.dtype([
+    ("header", "u1"), ("timestamp", "<u4"), ("lat", "<i4"), ("lon", "<i4"),
+    ("altitude", "<u2"), ("heart_rate", "u1"), ("distance", "<u4"), ("speed", "<u2"),
+])
+
+
+def _crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+CRC_TABLE = _crc_table()
+CRC_TABLE_NP = np.array(CRC_TABLE, dtype=np.int64)
+_BYTE_BITS = (np.arange(256)[:, None] >> np.arange(8)) & 1
+
+
+def _crc16_loop(data):
+    table = CRC_TABLE
+    crc = 0
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def crc16(data):
+    """
+    CRC des fichiers FIT (CRC-16/ARC, polynôme 0x8005 réfléchi, valeur initiale 0).
+
+    Le CRC est linéaire : crc(A + B) = Z^len(B)(crc(A)) ^ crc(B), où Z fait
+    avancer le registre d'un octet nul. Les CRC des octets isolés sont donc
+    fusionnés deux à deux, niveau par niveau, en quelques opérations NumPy par
+    niveau ; Z^m est appliqué par deux tables de 256 entrées (octet bas, octet
+    haut). Les octets nuls ajoutés en tête ne changent pas le résultat.
+    """
+    if len(data) < 4096:
+        return _crc16_loop(data)
+    values = np.frombuffer(data, dtype=np.uint8)
+    size = 1 << (len(values) - 1).bit_length()
+    crcs = np.zeros(size, dtype=np.int64)
+    crcs[size - len(values):] = CRC_TABLE_NP[values]
+    # Image des 16 bits du registre par Z (un octet nul)
+    images = np.array([((1 << bit) >> 8) ^ CRC_TABLE[(1 << bit) & 0xFF] for bit in range(16)], dtype=np.int64)
+    while len(crcs) > 1:
+        low = np.bitwise_xor.reduce(_BYTE_BITS * images[:8], axis=1)
+        high = np.bitwise_xor.reduce(_BYTE_BITS * images[8:], axis=1)
+        heads = crcs[0::2]
+        crcs = low[heads & 0xFF] ^ high[heads >> 8] ^ crcs[1::2]
+        images = low[images & 0xFF] ^ high[images >> 8]  # Z^2m = Z^m ∘ Z^m
+    return int(crcs[0])
+
+
+def fit_timestamp(dt):
+    """
+    Secondes depuis l'époque FIT ; une date naïve est prise en heure locale.
+    """
+    return int(dt.timestamp()) - FIT_EPOCH
+
+
+class FITWriter:
+    """
+    Fichier FIT d'activité en mémoire, écrit d'un bloc par `getvalue` (la
+    taille des données figure dans l'en-tête). Une activité par fichier, un
+    tour et une session.
+    """
+
+    def __init__(self, activity_type, start_time=None):
+        self.sport = SPORTS.get(activity_type, 0)
+        self.start = fit_timestamp(start_time or datetime.now())
+        self._chunks = []
+        self._defined = set()
+        self._message(FILE_ID, 4, MANUFACTURER_DEVELOPMENT, 0, 1, self.start)
+        self._message(EVENT, self.start, EVENT_TIMER, EVENT_START)
+
+    def _define(self, global_num):
+        local = LOCAL[global_num]
+        fields = FIELDS[global_num]
+        definition = struct.pack("<BBBHB", 0x40 | local, 0, 0, global_num, len(fields))
+        definition += b"".join(struct.pack("BBB", num, SIZES[base], base) for num, base in fields)
+        self._chunks.append(definition)
+        self._defined.add(global_num)
+        return local
+
+    def _message(self, global_num, *values):
+        local = LOCAL[global_num] if global_num in self._defined else self._define(global_num)
+        fmt = "<B" + "".join(FORMATS[base] for _, base in FIELDS[global_num])
+        self._chunks.append(struct.pack(fmt, local, *values))
+
+    def write_records(self, elapsed_s, lats, lons, altitudes, heart_rates, distances_m, speeds_kmh):
+        """
+        Messages `record` pour des tableaux de points, empaquetés en un bloc.
+        """
+        local = LOCAL[RECORD] if RECORD in self._defined else self._define(RECORD)
+        records = np.empty(len(lats), dtype=RECORD_DTYPE)
+        records["header"] = local
+        records["timestamp"] = self.start + np.asarray(elapsed_s, dtype=np.int64)
+        records["lat"] = np.round(np.asarray(lats) * SEMICIRCLES_PER_DEG)
+        records["lon"] = np.round(np.asarray(lons) * SEMICIRCLES_PER_DEG)
+        # Altitude : échelle 5, décalage 500 m ; vitesse en mm/s ; distance en cm
+        records["altitude"] = np.clip(np.round((np.asarray(altitudes) + 500) * 5), 0, 0xFFFE)
+        records["heart_rate"] = np.clip(heart_rates, 0, 0xFE)
+        records["distance"] = np.round(np.asarray(distances_m) * 100)
+        records["speed"] = np.clip(np.round(np.asarray(speeds_kmh) / 3.6 * 1000), 0, 0xFFFE)
+        self._chunks.append(records.tobytes())
+
+    def close(self, total_seconds, distance_m, calories):
+        end = self.start + int(total_seconds)
+        elapsed_ms = int(total_seconds * 1000)
+        distance_cm = int(round(distance_m * 100))
+        self._message(EVENT, end, EVENT_TIMER, EVENT_STOP_ALL)
+        self._message(LAP, end, self.start, elapsed_ms, elapsed_ms, distance_cm, calories, self.sport,
+                      EVENT_LAP, EVENT_STOP)
+        self._message(SESSION, end, self.start, elapsed_ms, elapsed_ms, distance_cm, calories, self.sport,
+                      0, 1, EVENT_SESSION, EVENT_STOP)
+        self._message(ACTIVITY, end, elapsed_ms, 1, 0, EVENT_ACTIVITY, EVENT_STOP)
+
+    def getvalue(self):
+        data = b"".join(self._chunks)
+        header = struct.pack("<BBHI4s", 14, PROTOCOL_VERSION, PROFILE_VERSION, len(data), b".FIT")
+        header += struct.pack("<H", crc16(header))
+        body = header + data
+        return body + struct.pack("<H", crc16(body))
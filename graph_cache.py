@@ -0,0 +1,267 @@
+import os
+import math
+import pickle
+import hashlib
+import tempfile
+import logging
+
+# osmnx (lourd à importer) n'est chargé que lorsqu'un graphe doit être téléchargé ou découpé
+
+# ---------- Configuration du cache ----------
+
+CACHE_DIR = os.environ.get(
+    "TCX_GRAPH_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "tcx-generator", "graphs"),
+)
+DISK_BUDGET_MB = float(os.environ.get("TCX_GRAPH_CACHE_MB", 500))
+
+CENTER_STEP_DEG = 0.01   # ~1 km : pas de quantification du centre
+RADIUS_STEP_M = 500      # les rayons sont arrondis au multiple supérieur
+MIN_TILE_RADIUS_M = 3000  # rayon minimal téléchargé, pour servir les requêtes voisines
+
+METERS_PER_DEG_LAT = 111320.0
+
+# Côté (en degrés) des mailles de la grille utilisée pour les grands parcours
+GRID_DEG = float(os.environ.get("TCX_GRAPH_GRID_DEG", 0.1))
+
+# Types de réseau osmnx -> pyrosm, pour les extraits .osm.pbf
+PYROSM_NETWORKS = {"walk": "walking", "bike": "cycling", "drive": "driving", "all": "all"}
+
+
+def _bbox(lat, lon, dist):
+    """
+    Boîte englobante (sud, nord, ouest, est) de demi-côté `dist` mètres,
+    identique à celle utilisée par `ox.graph_from_point` (dist_type='bbox').
+    """
+    dlat = dist / METERS_PER_DEG_LAT
+    dlon = dist / (METERS_PER_DEG_LAT * math.cos(math.radians(lat)))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def _contains(outer, inner):
+    return (outer[0] <= inner[0] and outer[1] >= inner[1]
+            and outer[2] <= inner[2] and outer[3] >= inner[3])
+
+
+def quantize(lat, lon, dist):
+    """
+    Ramène une requête (centre, rayon) sur la grille du cache.
+    Le rayon est agrandi d'une demi-cellule pour que la tuile
+    quantifiée couvre toujours la zone demandée.
+    """
+    qlat = round(round(lat / CENTER_STEP_DEG) * CENTER_STEP_DEG, 6)
+    qlon = round(round(lon / CENTER_STEP_DEG) * CENTER_STEP_DEG, 6)
+    half_cell_m = CENTER_STEP_DEG * METERS_PER_DEG_LAT / 2
+    radius = max(dist + half_cell_m, MIN_TILE_RADIUS_M)
+    radius = int(math.ceil(radius / RADIUS_STEP_M) * RADIUS_STEP_M)
+    return qlat, qlon, radius
+
+
+def _tile_path(network_type, qlat, qlon, radius):
+    return os.path.join(CACHE_DIR, f"{network_type}_{qlat:.6f}_{qlon:.6f}_{radius}.pkl")
+
+
+def _list_tiles(network_type):
+    """
+    Tuiles présentes sur disque pour ce type de réseau : [(chemin, lat, lon, rayon)].
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    tiles = []
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".pkl"):
+            continue
+        parts = name[:-4].rsplit("_", 3)
+        if len(parts) != 4 or parts[0] != network_type:
+            continue
+        try:
+            tiles.append((os.path.join(CACHE_DIR, name), float(parts[1]), float(parts[2]), int(parts[3])))
+        except ValueError:
+            continue
+    return tiles
+
+
+def _find_covering_tile(lat, lon, dist, network_type):
+    """
+    Plus petite tuile en cache dont l'emprise contient la zone demandée.
+    """
+    wanted = _bbox(lat, lon, dist)
+    covering = [t for t in _list_tiles(network_type) if _contains(_bbox(t[1], t[2], t[3]), wanted)]
+    if not covering:
+        return None
+    return min(covering, key=lambda t: t[3])
+
+
+def _read_tile(path):
+    with open(path, "rb") as f:
+        G = pickle.load(f)
+    try:
+        os.utime(path)  # marque la tuile comme récemment utilisée (LRU)
+    except FileNotFoundError:
+        pass  # évincée entre-temps par un autre processus
+    return G
+
+
+def _write_tile(G, path):
+    # Fichier temporaire propre à l'appel : plusieurs processus peuvent écrire
+    # la même tuile en même temps, le dernier renommage l'emporte
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(G, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def evict(budget_mb=None):
+    """
+    Supprime les tuiles les moins récemment utilisées jusqu'à respecter le budget disque.
+    """
+    budget = (DISK_BUDGET_MB if budget_mb is None else budget_mb) * 1024 * 1024
+    if not os.path.isdir(CACHE_DIR):
+        return
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith(".pkl"):
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # évincée entre-temps par un autre processus
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        logging.info("Tuile de graphe évincée du cache : %s", os.path.basename(path))
+
+
+def slice_graph(G, lat, lon, dist):
+    """
+    Extrait d'une tuile plus large le sous-graphe couvrant la zone demandée,
+    en conservant la plus grande composante connexe comme `graph_from_point`.
+    """
+    import osmnx as ox
+
+    south, north, west, east = _bbox(lat, lon, dist)
+    nodes = [n for n, d in G.nodes(data=True)
+             if south <= d["y"] <= north and west <= d["x"] <= east]
+    sub = G.subgraph(nodes).copy()
+    if len(sub):
+        sub = ox.truncate.largest_component(sub)
+    return sub
+
+
+def load_graph(lat, lon, dist, network_type="walk"):
+    """
+    Équivalent de `ox.graph_from_point(..., dist=dist, network_type=...)` servi
+    depuis le cache disque quand une tuile couvre déjà la zone.
+    """
+    tile = _find_covering_tile(lat, lon, dist, network_type)
+    if tile is not None:
+        path, tlat, tlon, tradius = tile
+        logging.info("Graphe servi depuis le cache : %s", os.path.basename(path))
+        G = _read_tile(path)
+    else:
+        import osmnx as ox
+
+        tlat, tlon, tradius = quantize(lat, lon, dist)
+        logging.info("Téléchargement de la tuile OSM : centre=(%s, %s), rayon=%s m, réseau=%s",
+                     tlat, tlon, tradius, network_type)
+        G = ox.graph_from_point((tlat, tlon), dist=tradius, network_type=network_type)
+        _write_tile(G, _tile_path(network_type, tlat, tlon, tradius))
+        evict()
+
+    if (tlat, tlon, tradius) == (lat, lon, dist):
+        return G
+    return slice_graph(G, lat, lon, dist)
+
+
+def _extract_path(path, network_type):
+    # L'empreinte change avec le fichier : un extrait mis à jour est relu
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"extract_{network_type}_{digest}.pkl")
+
+
+def _graph_from_pbf(path, network_type):
+    try:
+        from pyrosm import OSM
+    except ImportError as e:
+        raise ImportError("La lecture d'un extrait .osm.pbf nécessite pyrosm (pip install pyrosm)") from e
+
+    osm = OSM(path)
+    nodes, edges = osm.get_network(network_type=PYROSM_NETWORKS[network_type], nodes=True)
+    return osm.to_graph(nodes, edges, graph_type="networkx", osmnx_compatible=True,
+                        force_bidirectional=network_type == "walk")
+
+
+def load_extract(path, network_type="walk"):
+    """
+    Graphe routier d'un extrait OSM local, sans accès réseau : .osm.pbf lu par
+    pyrosm (filtré selon `network_type`), ou .osm/.xml lu par osmnx (l'extrait
+    doit alors être déjà filtré, par exemple avec `osmium tags-filter`).
+    Le graphe construit est conservé dans le cache disque tant que le fichier
+    ne change pas.
+    """
+    cached = _extract_path(path, network_type)
+    if os.path.exists(cached):
+        logging.info("Extrait OSM servi depuis le cache : %s", os.path.basename(cached))
+        return _read_tile(cached)
+
+    logging.info("Lecture de l'extrait OSM %s (réseau=%s)", path, network_type)
+    if path.endswith(".pbf"):
+        G = _graph_from_pbf(path, network_type)
+    else:
+        import osmnx as ox
+
+        G = ox.graph_from_xml(path, bidirectional=network_type == "walk")
+    _write_tile(G, cached)
+    evict()
+    return G
+
+
+def grid_key(lat, lon):
+    """
+    Maille de la grille (ligne, colonne) contenant le point.
+    """
+    return math.floor(lat / GRID_DEG), math.floor(lon / GRID_DEG)
+
+
+def load_grid_tile(key, network_type="walk"):
+    """
+    Arêtes d'une maille de la grille, sous forme de tableaux
+    (voir `compact_graph.networkx_edges`) plutôt que de graphe networkx.
+    Les arêtes qui franchissent le bord sont gardées avec leur extrémité
+    extérieure, commune avec la maille voisine : les mailles se recousent par
+    identifiant de nœud. Une maille sans route (mer, forêt) est vide.
+    """
+    path = os.path.join(CACHE_DIR, f"grid_{network_type}_{key[0]}_{key[1]}.pkl")
+    if os.path.exists(path):
+        return _read_tile(path)
+
+    import networkx as nx
+    import osmnx as ox
+    from osmnx._errors import InsufficientResponseError
+    from compact_graph import networkx_edges
+
+    south, west = key[0] * GRID_DEG, key[1] * GRID_DEG
+    logging.info("Téléchargement de la maille OSM %s (réseau=%s)", key, network_type)
+    try:
+        G = ox.graph_from_bbox((west, south, west + GRID_DEG, south + GRID_DEG), network_type=network_type,
+                               retain_all=True, truncate_by_edge=True)
+    except InsufficientResponseError:
+        G = nx.MultiDiGraph()
+    edges = networkx_edges(G)
+    _write_tile(edges, path)
+    evict()
+    return edges
@@ -0,0 +1,49 @@
+import numpy as np
+
+LANDMARK_COUNT = 8
+BOUND_MARGIN_M = 1.0  # compense l'arrondi float32 des distances conservées
+
+
+class Landmarks:
+    """
+    Prétraitement ALT d'un `CompactGraph` : distances depuis et vers quelques
+    nœuds repères, choisis successivement le plus loin possible des repères
+    déjà retenus. Par inégalité triangulaire elles donnent en O(repères) un
+    minorant de la distance réseau entre deux nœuds quelconques.
+    Mémoire : 2 × repères × nœuds × 4 octets (une seule table si le graphe est
+    symétrique).
+    """
+
+    def __init__(self, graph, count=LANDMARK_COUNT, seed=0):
+        n = len(graph)
+        symmetric = graph.is_symmetric()
+        rng = np.random.default_rng(seed)
+        score, _ = graph.dijkstra(int(rng.integers(n)))
+        self.nodes = []
+        dist_from, dist_to = [], []
+        for _ in range(min(count, n)):
+            landmark = int(np.argmax(np.where(np.isfinite(score), score, -1)))
+            d_from, _ = graph.dijkstra(landmark)
+            self.nodes.append(landmark)
+            dist_from.append(d_from.astype(np.float32))
+            if not symmetric:
+                dist_to.append(graph.dijkstra(landmark, reverse=True)[0].astype(np.float32))
+            score = d_from if len(self.nodes) == 1 else np.minimum(score, d_from)
+        self.dist_from = np.array(dist_from)
+        self.dist_to = self.dist_from if symmetric else np.array(dist_to)
+
+    @property
+    def nbytes(self):
+        return self.dist_from.nbytes + (0 if self.dist_to is self.dist_from else self.dist_to.nbytes)
+
+    def lower_bound(self, u, v):
+        """
+        Minorant de la distance réseau u → v (en mètres, infini si v est
+        inaccessible depuis u), pour des tableaux d'indices de nœuds.
+        """
+        with np.errstate(invalid="ignore"):
+            # d(L, v) - d(L, u) ≤ d(u, v) et d(u, L) - d(v, L) ≤ d(u, v)
+            bounds = np.concatenate((self.dist_from[:, v] - self.dist_from[:, u],
+                                     self.dist_to[:, u] - self.dist_to[:, v]))
+        bounds = np.where(np.isnan(bounds), -np.inf, bounds).max(axis=0)
+        return np.maximum(bounds.astype(np.float64) - BOUND_MARGIN_M, 0.0)
@@ -0,0 +1,220 @@
+import math
+import random
+import logging
+import multiprocessing as mp
+import numpy as np
+
+METERS_PER_DEG_LAT = 111320.0
+DETOUR_RANGE = (1.15, 1.6)  # facteur de détour du réseau tiré pour chaque forme
+MAX_RETRACE = 0.3  # part maximale d'arêtes parcourues deux fois dans une boucle (un aller-retour pur vaut 0,5)
+
+# État partagé par les processus du pool (hérité par fork ou passé à l'initialisation)
+_worker_state = None
+
+
+class ShortestPathTree:
+    """
+    Arbre des plus courts chemins depuis (ou vers, si `reverse`) un nœud racine,
+    limité aux nœuds à moins de `limit` mètres.
+    Les étiquettes de distance et les prédécesseurs sont calculés une seule fois ;
+    chemin et longueur d'un nœud s'obtiennent ensuite en O(longueur du chemin).
+    """
+
+    def __init__(self, graph, root, reverse=False, limit=np.inf):
+        self.root = root
+        self.reverse = reverse
+        self.dist, self.pred = graph.dijkstra(root, reverse=reverse, limit=limit)
+
+    def __contains__(self, node):
+        return bool(np.isfinite(self.dist[node]))
+
+    def length(self, node):
+        return float(self.dist[node])
+
+    def path(self, node):
+        """
+        Chemin racine → nœud (ou nœud → racine pour un arbre inversé).
+        """
+        pred = self.pred
+        path = [node]
+        while node != self.root:
+            node = int(pred[node])
+            path.append(node)
+        if not self.reverse:
+            path.reverse()
+        return path
+
+
+def _leg(pred_row, src, dst):
+    """
+    Chemin src → dst reconstruit depuis la ligne de prédécesseurs d'un Dijkstra.
+    """
+    path = [dst]
+    while dst != src:
+        dst = int(pred_row[dst])
+        path.append(dst)
+    path.reverse()
+    return path
+
+
+def waypoint_positions(start_lat, start_lon, target_m, bearing, n_waypoints, detour):
+    """
+    Points de passage répartis sur un cercle qui passe par le départ, dont le
+    périmètre vaut la distance cible divisée par le facteur de détour du réseau.
+    `bearing` (radians) oriente le centre du cercle par rapport au départ.
+    """
+    radius = target_m / (2 * math.pi * detour)
+    m_per_deg_lon = METERS_PER_DEG_LAT * math.cos(math.radians(start_lat))
+    center_x = radius * math.sin(bearing)
+    center_y = radius * math.cos(bearing)
+    angles = bearing + math.pi + 2 * math.pi * np.arange(1, n_waypoints + 1) / (n_waypoints + 1)
+    lat = start_lat + (center_y + radius * np.cos(angles)) / METERS_PER_DEG_LAT
+    lon = start_lon + (center_x + radius * np.sin(angles)) / m_per_deg_lon
+    return lat, lon
+
+
+def candidate_nodes(graph, tree_out, tree_back, target_m, tolerance):
+    """
+    Nœuds pouvant servir de point de passage : dans la couronne où tombent les
+    positions idéales des points de passage, et assez proches du départ par le
+    réseau pour qu'une boucle passant par eux tienne dans la fenêtre de longueur.
+    """
+    start = tree_out.root
+    # Corde départ → point de passage : 2R·sin(45°) à 2R, R = cible / (2π·détour)
+    r_min = math.sqrt(2) * target_m / (2 * math.pi * DETOUR_RANGE[1])
+    r_max = 2 * target_m / (2 * math.pi * DETOUR_RANGE[0])
+    ring = graph.spatial_index.annulus(graph.lat[start], graph.lon[start], r_min / 2, r_max * 1.5)
+    # Une boucle passant par w mesure au moins aller(w) + retour(w)
+    fits = tree_out.dist[ring] + tree_back.dist[ring] <= (1 + tolerance) * target_m
+    return ring[fits]
+
+
+def evaluate_candidate(shape, graph, tree_out, tree_back, snap_index, target_m, tolerance, landmarks=None):
+    """
+    Boucle départ → points de passage → départ pour une forme
+    (orientation, nombre de points, facteur de détour), si sa longueur est dans
+    la fenêtre ; sinon None. Les points de passage sont les nœuds de
+    `snap_index` (voir `candidate_nodes`) les plus proches des positions idéales.
+    Avec des `landmarks` (ALT), une forme dont le minorant de longueur dépasse
+    la fenêtre est rejetée sans recherche, et chaque tronçon est cherché à part,
+    borné par le budget restant moins le minorant des tronçons suivants ; le
+    résultat est le même que sans repères.
+    """
+    bearing, n_waypoints, detour = shape
+    start = tree_out.root
+    lat, lon = waypoint_positions(graph.lat[start], graph.lon[start], target_m, bearing, n_waypoints, detour)
+    waypoints = [int(w) for w in snap_index.nearest(lat, lon)]
+
+    length = tree_out.length(waypoints[0]) + tree_back.length(waypoints[-1])
+    if length > (1 + tolerance) * target_m:
+        return None
+    path = tree_out.path(waypoints[0])
+    if landmarks is not None and len(waypoints) > 1:
+        bounds = landmarks.lower_bound(waypoints[:-1], waypoints[1:])
+        for i, (src, dst) in enumerate(zip(waypoints[:-1], waypoints[1:])):
+            # Un tronçon ne peut pas dépasser le reste du budget moins le minorant des suivants
+            limit = (1 + tolerance) * target_m - length - bounds[i + 1:].sum()
+            if bounds[i] > limit:
+                return None
+            dist, pred = graph.dijkstra(src, limit=limit)
+            if not np.isfinite(dist[dst]):
+                return None
+            length += dist[dst]
+            path += _leg(pred, src, dst)[1:]
+    elif len(waypoints) > 1:
+        dist, pred = graph.dijkstra(waypoints[:-1], limit=(1 + tolerance) * target_m - length)
+        for i, (src, dst) in enumerate(zip(waypoints[:-1], waypoints[1:])):
+            if not np.isfinite(dist[i, dst]):
+                return None
+            length += dist[i, dst]
+            path += _leg(pred[i], src, dst)[1:]
+    if abs(length - target_m) >= tolerance * target_m:
+        return None
+    if tree_back is tree_out:
+        path += tree_out.path(waypoints[-1])[::-1][1:]
+    else:
+        path += tree_back.path(waypoints[-1])[1:]
+    return path, float(length)
+
+
+def edge_keys(path, n_nodes):
+    """
+    Arêtes d'un chemin, sans orientation, sous forme d'entiers hachables.
+    """
+    path = np.asarray(path, dtype=np.int64)
+    u, v = path[:-1], path[1:]
+    return (np.minimum(u, v) * n_nodes + np.maximum(u, v)).tolist()
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _evaluate_in_worker(shape):
+    return evaluate_candidate(shape, *_worker_state)
+
+
+def _iter_parallel(candidates, state, workers, batch_size):
+    """
+    Évalue les candidats dans un pool de processus ; les résultats sont rendus
+    dans l'ordre des candidats, quel que soit l'ordre de fin des processus.
+    """
+    method = "fork" if "fork" in mp.get_all_start_methods() else None
+    with mp.get_context(method).Pool(workers, initializer=_init_worker, initargs=(state,)) as pool:
+        yield from pool.imap(_evaluate_in_worker, candidates, chunksize=batch_size)
+
+
+def find_loops(graph, start_node, target_m, num_routes=3, tolerance=0.1, seed=None,
+               workers=None, batch_size=8, max_overlap=0.5, max_retrace=MAX_RETRACE, landmarks=None):
+    """
+    Cherche `num_routes` boucles de longueur `target_m` ± tolérance sur un
+    `CompactGraph` (nœuds désignés par leur indice).
+    Chaque boucle passe par 2 ou 3 points de passage placés autour du départ ;
+    les arbres de plus courts chemins depuis et vers le départ sont calculés une
+    seule fois et servent au premier et au dernier tronçon.
+    Une boucle est rejetée si plus de `max_retrace` de ses arêtes sont
+    parcourues deux fois (aller-retour), ou si trop d'entre elles sont déjà
+    empruntées par une boucle retenue (`max_overlap`).
+    Avec `workers` > 1, les formes candidates sont évaluées par lots dans un pool
+    de processus ; pour une graine donnée le résultat est identique au mode
+    séquentiel. Les `landmarks` (voir landmarks.py) accélèrent les grands
+    graphes sans changer le résultat.
+    """
+    rng = random.Random(seed)
+    # Au-delà de la longueur maximale, aucun nœud ne peut servir de point de passage
+    limit = (1 + tolerance) * target_m
+    tree_out = ShortestPathTree(graph, start_node, limit=limit)
+    tree_back = tree_out if graph.is_symmetric() else ShortestPathTree(graph, start_node, reverse=True, limit=limit)
+    shapes = [(rng.uniform(0, 2 * math.pi), rng.choice((2, 3)), rng.uniform(*DETOUR_RANGE))
+              for _ in range(num_routes * 30)]
+    candidates = candidate_nodes(graph, tree_out, tree_back, target_m, tolerance)
+    logging.info("Points de passage possibles : %s nœuds sur %s", len(candidates), len(graph))
+    if len(candidates) == 0:
+        return []
+
+    state = (graph, tree_out, tree_back, graph.spatial_index.subset(candidates), target_m, tolerance, landmarks)
+    if workers and workers > 1:
+        results = _iter_parallel(shapes, state, workers, batch_size)
+    else:
+        results = (evaluate_candidate(shape, *state) for shape in shapes)
+
+    loops = []
+    used_edges = []
+    for result in results:
+        if result is None:
+            continue
+        full_path, length = result
+        keys = edge_keys(full_path, len(graph))
+        edges = set(keys)
+        if not keys or 1 - len(edges) / len(keys) > max_retrace:
+            continue  # aller-retour sur le même chemin
+        if any(len(edges & other) > max_overlap * len(edges) for other in used_edges):
+            continue  # quasi-doublon d'une boucle retenue
+        used_edges.append(edges)
+        loops.append((full_path, length))
+        logging.info("Boucle trouvée : longueur=%.2f m", length)
+        if len(loops) >= num_routes:
+            break
+    results.close()
+    return loops
@@ -0,0 +1,126 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from route_cache import RouteCache, request_key
+
+ORS_API_KEY = os.environ.get("ORS_API_KEY", "5b3ce3597851110001cf6248cae52fb8f7894709b0afefda9e71296f")
+ORS_URL = "https://api.openrouteservice.org/v2/directions/{profile}/geojson"
+
+# Quota du plan gratuit ORS pour /directions : 40 requêtes par minute
+ORS_MAX_CALLS = int(os.environ.get("ORS_MAX_CALLS", 40))
+ORS_PERIOD_S = float(os.environ.get("ORS_PERIOD_S", 60))
+
+
+class RateLimiter:
+    """
+    Fenêtre glissante : au plus `max_calls` appels sur `period` secondes,
+    partagée entre les threads. `acquire` bloque jusqu'à ce qu'un créneau se libère.
+    """
+
+    def __init__(self, max_calls=ORS_MAX_CALLS, period=ORS_PERIOD_S):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._calls = [t for t in self._calls if now - t < self.period]
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+class ORSClient:
+    """
+    Client OpenRouteService à connexions persistantes (keep-alive) : les
+    requêtes de plusieurs graines partent en parallèle sur le même pool.
+    Avec un `cache`, une requête déjà servie est rendue sans accès réseau.
+    """
+
+    def __init__(self, api_key=ORS_API_KEY, timeout=(5, 30), max_workers=4, rate_limiter=None, cache=None):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': api_key,
+            'Content-Type': 'application/json'
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.url = ORS_URL
+
+    def round_trip(self, start_lat, start_lon, distance_km, seed, profile="foot-walking"):
+        """
+        Boucle ORS de `distance_km` autour du départ ; coordonnées [lon, lat]
+        ou liste vide en cas d'erreur.
+        """
+        body = {
+            "coordinates": [[start_lon, start_lat]],
+            "profile": profile,
+            "format": "geojson",
+            "options": {"round_trip": {"length": distance_km * 1000, "seed": seed}}
+        }
+        url = self.url.format(profile=profile)
+        key = request_key(url, body)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        self.rate_limiter.acquire()
+        try:
+            response = self.session.post(url, json=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            logging.warning("Erreur réseau OpenRouteService (graine %s) : %s", seed, e)
+            return []
+        if response.status_code == 200:
+            coords = response.json()['features'][0]['geometry']['coordinates']
+            if self.cache is not None:
+                self.cache.set(key, coords)
+            return coords
+        logging.warning("Erreur OpenRouteService %s (graine %s) : %s", response.status_code, seed, response.text)
+        return []
+
+    def round_trips(self, start_lat, start_lon, distance_km, seeds, profile="foot-walking"):
+        """
+        Une boucle par graine, requêtes envoyées simultanément ; les résultats
+        sont rendus dans l'ordre des graines.
+        """
+        return list(self.executor.map(
+            lambda seed: self.round_trip(start_lat, start_lon, distance_km, seed, profile), seeds))
+
+
+_client = None
+
+
+def get_client():
+    """
+    Client partagé par le processus, pour réutiliser les connexions et le cache
+    de réponses entre les réexécutions Streamlit.
+    """
+    global _client
+    if _client is None:
+        _client = ORSClient(cache=RouteCache())
+    return _client
+
+
+def share_quota(processes):
+    """
+    Limite le client partagé à sa part du quota ORS quand `processes` processus
+    utilisent la même clé : au plus ORS_MAX_CALLS appels par ORS_PERIOD_S
+    secondes à eux tous, même avec plus de processus que d'appels autorisés.
+    """
+    calls = max(1, ORS_MAX_CALLS // processes)
+    get_client().rate_limiter = RateLimiter(calls, ORS_PERIOD_S * calls * processes / ORS_MAX_CALLS)
@@ -0,0 +1,54 @@
+import numpy as np
+
+# Modèle d'effort : la pente renchérit le coût du segment, l'athlète n'en
+# compense qu'une partie en ralentissant, le reste se traduit en FC.
+UPHILL_COST = 3.3        # +3,3 % de coût par % de montée
+DOWNHILL_COST = 1.8      # -1,8 % de coût par % de descente...
+MIN_COST = 0.8           # ... au plus -20 % (au-delà, on freine)
+MAX_GRADE = 0.25
+SPEED_COMPENSATION = 0.7  # part du surcoût absorbée par la vitesse
+
+HR_REST_BPM = 60
+HR_TAU_S = 30.0          # constante de temps de la réponse cardiaque
+HR_START = 0.5           # FC au départ, en fraction de la réserve (moyenne - repos)
+
+
+def segment_grades(altitude, segments):
+    """
+    Pente (m/m) de chaque segment, bornée à ±MAX_GRADE ; les segments de moins
+    d'un mètre sont traités comme s'ils mesuraient un mètre.
+    """
+    return np.clip(np.diff(altitude) / np.maximum(segments, 1.0), -MAX_GRADE, MAX_GRADE)
+
+
+def grade_cost(grade):
+    """
+    Coût énergétique relatif d'un segment par rapport au plat.
+    """
+    return np.where(grade > 0, 1 + UPHILL_COST * grade, np.maximum(1 + DOWNHILL_COST * grade, MIN_COST))
+
+
+def grade_adjusted_speed(flat_speed, grade):
+    """
+    Vitesse réelle sur la pente pour une allure `flat_speed` sur le plat.
+    """
+    return flat_speed / grade_cost(grade) ** SPEED_COMPENSATION
+
+
+def heart_rate_response(vertex_s, effort, hr_avg, hr_rest=HR_REST_BPM, tau_s=HR_TAU_S):
+    """
+    FC aux instants `vertex_s` : l'effort de chaque segment (1 = allure moyenne
+    sur le plat) fixe une FC d'équilibre, que la FC rejoint avec un retard du
+    premier ordre de constante `tau_s`. La récurrence est évaluée par
+    `scipy.signal.lfilter` sur une grille d'une seconde, puis ramenée aux sommets.
+    """
+    from scipy.signal import lfilter
+
+    grid = np.arange(0.0, vertex_s[-1] + 1.0)
+    segment = np.clip(np.searchsorted(vertex_s, grid, side="right") - 1, 0, len(effort) - 1)
+    target = hr_rest + (hr_avg - hr_rest) * effort[segment] if len(effort) else np.full(len(grid), hr_avg)
+    alpha = 1 - np.exp(-1.0 / tau_s)
+    start = hr_rest + HR_START * (hr_avg - hr_rest)
+    # y[k] = (1 - alpha) y[k-1] + alpha x[k], avec y[-1] = FC de départ
+    hr, _ = lfilter([alpha], [1, alpha - 1], target, zi=[(1 - alpha) * start])
+    return np.interp(vertex_s, grid, hr)
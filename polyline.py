@@ -0,0 +1,103 @@
+import numpy as np
+
+METERS_PER_DEG_LAT = 111320.0
+# Résolution au zoom 0 d'une carte Web Mercator (tuiles de 256 px), en m/pixel à l'équateur
+METERS_PER_PIXEL_Z0 = 156543.03
+
+
+def tolerance_for_zoom(zoom, lat, pixels=1.0):
+    """
+    Tolérance de simplification en mètres : `pixels` pixels au niveau de zoom
+    donné, à la latitude du tracé. Un écart plus petit ne se voit pas à l'écran.
+    """
+    return pixels * METERS_PER_PIXEL_Z0 * np.cos(np.radians(lat)) / 2 ** zoom
+
+
+def simplify_mask(points, tolerance_m):
+    """
+    Douglas–Peucker sur un tracé (N, 2) de points (lat, lon) : masque des
+    points conservés, extrémités comprises, de sorte qu'aucun point retiré ne
+    soit à plus de `tolerance_m` mètres du tracé simplifié. Les distances d'une
+    plage sont calculées en un seul appel NumPy.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+    if n < 3:
+        return np.ones(n, dtype=bool)
+    cos_lat = np.cos(np.radians(points[:, 0].mean()))
+    xy = np.column_stack((points[:, 1] * cos_lat, points[:, 0])) * METERS_PER_DEG_LAT
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        segment = xy[last] - xy[first]
+        rel = xy[first + 1:last] - xy[first]
+        length2 = segment @ segment
+        if length2 > 0:
+            # Distance au segment (projection bornée aux extrémités)
+            t = np.clip(rel @ segment / length2, 0.0, 1.0)
+            rel = rel - t[:, None] * segment
+        dist = np.hypot(rel[:, 0], rel[:, 1])
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance_m:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def simplify(points, tolerance_m):
+    """
+    Points conservés par `simplify_mask`.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return points[simplify_mask(points, tolerance_m)]
+
+
+def encode(latlon, precision=6):
+    """
+    Tracé (N, 2) de points (lat, lon) au format « encoded polyline » de Google,
+    avec `precision` décimales (6 : ~0,1 m, format polyline6 d'OSRM/Valhalla).
+    Une chaîne ASCII de quelques octets par point, à la place de N tuples Python.
+    """
+    points = np.round(np.asarray(latlon, dtype=np.float64).reshape(-1, 2) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(points, axis=0, prepend=0).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    # Découpage en blocs de 5 bits, du poids faible au poids fort ; 0x20 marque
+    # les blocs suivis d'un autre
+    shifts = 5 * np.arange(8)
+    remaining = values[:, None] >> shifts
+    count = np.maximum(1, (remaining > 0).sum(axis=1))[:, None]
+    chunks = (remaining & 0x1f) | np.where(np.arange(8) < count - 1, 0x20, 0)
+    return (chunks[np.arange(8) < count] + 63).astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode(encoded, precision=6):
+    """
+    Inverse d'`encode` : tableau (N, 2) de points (lat, lon).
+    """
+    chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if len(chunks) == 0:
+        return np.empty((0, 2))
+    ends = np.flatnonzero(chunks < 0x20)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(len(chunks)) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((chunks & 0x1f) << (5 * position), starts)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision
+
+
+def lod_points(latlon, zoom):
+    """
+    Points à transmettre à `folium.PolyLine` pour un affichage au zoom donné ;
+    les exports TCX/GPX gardent, eux, le tracé complet.
+    """
+    latlon = np.asarray(latlon, dtype=np.float64).reshape(-1, 2)
+    if len(latlon) == 0:
+        return []
+    return simplify(latlon, tolerance_for_zoom(zoom, latlon[0, 0])).tolist()
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+CACHE_PATH = os.environ.get(
+    "TCX_ROUTE_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "tcx-generator", "routes.sqlite"),
+)
+CACHE_TTL_S = float(os.environ.get("TCX_ROUTE_CACHE_TTL", 30 * 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("TCX_ROUTE_CACHE_ENTRIES", 5000))
+MEMORY_MAX_ENTRIES = 256
+
+COORD_DECIMALS = 5  # ~1 m : deux clics quasi identiques partagent la même entrée
+
+
+def _round(value):
+    if isinstance(value, float):
+        return round(value, COORD_DECIMALS)
+    if isinstance(value, dict):
+        return {k: _round(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_round(v) for v in value]
+    return value
+
+
+def request_key(url, body):
+    """
+    Empreinte SHA-256 de la requête (URL + corps arrondi, clés triées).
+    """
+    canonical = json.dumps([url, _round(body)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class RouteCache:
+    """
+    Cache des réponses de routage indexé par empreinte de requête : LRU en
+    mémoire, adossé à une base SQLite sur disque. Les entrées plus vieilles que
+    `ttl` secondes sont ignorées ; au-delà de `max_entries`, les moins récemment
+    utilisées sont supprimées du disque. Les lectures servies par la mémoire
+    mettent à jour la date d'accès sur disque par lots, avant chaque éviction.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES,
+                 memory_entries=MEMORY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._touched = {}  # clé -> dernier accès en mémoire, pas encore écrit sur disque
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS routes ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    return value
+                del self._memory[key]
+                self._touched.pop(key, None)
+
+            row = self._db.execute("SELECT value, created FROM routes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[1], now):
+                self._db.execute("DELETE FROM routes WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE routes SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?)",
+                             (key, json.dumps(value), now, now))
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._db.execute(
+                "DELETE FROM routes WHERE key IN ("
+                "SELECT key FROM routes ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+            self._db.commit()
+            self._remember(key, now, value)
+
+    def _flush_touched(self):
+        """
+        Reporte sur disque les accès servis par la mémoire, pour que l'éviction
+        LRU ne supprime pas les routes les plus demandées.
+        """
+        if self._touched:
+            self._db.executemany("UPDATE routes SET accessed = ? WHERE key = ?",
+                                 [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM routes")
+            self._db.commit()
@@ -0,0 +1,203 @@
+"""
+Calcul des boucles derrière une interface commune : `round_trip` et
+`round_trips` rendent des coordonnées [lon, lat] (forme GeoJSON des réponses
+ORS), ou une liste vide si aucune boucle n'a été trouvée.
+
+- "ors"   : API OpenRouteService (réseau, quota) ;
+- "local" : boucles calculées sur le graphe OSM, depuis le cache de tuiles ou
+            un extrait local (TCX_OSM_EXTRACT, .osm.pbf ou .osm), sans réseau
+            une fois le graphe en cache.
+
+Au-delà de TILED_FROM_KM, le routeur local assemble le graphe à partir des
+mailles de la grille atteintes par le réseau (voir tiled_graph.py) et accélère
+la recherche par des repères ALT (voir landmarks.py).
+
+Le routeur par défaut est choisi par la variable TCX_ROUTER, le nombre de
+processus de recherche des boucles locales par TCX_LOOP_WORKERS. Le type
+d'activité fixe le réseau OSM du graphe local et le profil ORS (voir PROFILES) :
+chaque réseau a ses propres tuiles en cache, et un graphe vélo ne charge pas le
+réseau piéton de la zone.
+"""
+import os
+import logging
+import functools
+import threading
+from compact_graph import CompactGraph
+from graph_cache import load_graph, load_extract, quantize
+from loop_engine import find_loops
+from ors_client import get_client
+from tiled_graph import TileSet
+
+ROUTER = os.environ.get("TCX_ROUTER", "ors")
+OSM_EXTRACT = os.environ.get("TCX_OSM_EXTRACT")
+LOOP_WORKERS = int(os.environ.get("TCX_LOOP_WORKERS", 1))
+
+MIN_PLACE_RADIUS_M = 1500
+TILED_FROM_KM = 10
+LOOP_TOLERANCE = 0.1  # tolérance de longueur de find_loops
+
+# Type d'activité -> (réseau OSM du graphe local, profil ORS)
+PROFILES = {
+    "Running": ("walk", "foot-walking"),
+    "Walking": ("walk", "foot-walking"),
+    "Biking": ("bike", "cycling-regular"),
+}
+DEFAULT_ACTIVITY = "Running"  # pour les types d'activité sans profil dédié
+
+
+@functools.lru_cache(maxsize=8)
+def load_compact_graph(lat, lon, place_radius, network_type='walk'):
+    """
+    Graphe OSM de la zone (cache disque) converti une fois en `CompactGraph`,
+    conservé en mémoire pour les appels suivants du même processus.
+    """
+    return CompactGraph.from_networkx(load_graph(lat, lon, place_radius, network_type=network_type))
+
+
+@functools.lru_cache(maxsize=2)
+def load_compact_extract(path, network_type='walk'):
+    """
+    Graphe d'un extrait OSM local converti en `CompactGraph`, gardé en mémoire.
+    """
+    return CompactGraph.from_networkx(load_extract(path, network_type))
+
+
+# Un seul jeu de mailles et un seul graphe recousu en mémoire, pour que
+# TCX_GRAPH_MEMORY_MB borne réellement la mémoire des grands parcours ; les
+# sessions Streamlit (un thread chacune) y accèdent sous verrou
+_tiles = None
+_tiled_graph = (None, None)  # (clé, graphe)
+_tiled_lock = threading.Lock()
+
+
+def load_tiled_graph(lat, lon, radius_m, network_type='walk'):
+    """
+    Graphe recousu des mailles atteintes par le réseau à moins de `radius_m`
+    mètres du point, gardé en mémoire avec ses repères pour les appels
+    suivants sur la même zone. Une session qui demande une autre zone attend
+    que le graphe en cours d'assemblage soit prêt.
+    """
+    global _tiles, _tiled_graph
+    key = (lat, lon, radius_m, network_type)
+    with _tiled_lock:
+        if _tiled_graph[0] != key:
+            _tiled_graph = (None, None)  # libéré avant d'assembler le suivant
+            if _tiles is None or _tiles.network_type != network_type:
+                _tiles = TileSet(network_type)
+            graph = _tiles.graph_around(lat, lon, radius_m)
+            if len(graph):
+                graph.landmarks  # calculés ici plutôt qu'en parallèle par chaque session
+            _tiled_graph = (key, graph)
+        return _tiled_graph[1]
+
+
+def place_radius(distance_km):
+    """
+    Rayon du graphe à charger autour du départ pour une boucle de `distance_km`.
+    """
+    return max(MIN_PLACE_RADIUS_M, distance_km * 500)
+
+
+def loop_coords(graph, path):
+    """
+    Tracé d'une boucle locale au format [(lon, lat), ...] des routes ORS.
+    """
+    return graph.coords(path)[:, ::-1].tolist()
+
+
+class ORSRouter:
+    """
+    Boucles OpenRouteService (client partagé : connexions, quota et cache).
+    """
+
+    def __init__(self, profile="foot-walking", client=None):
+        self.profile = profile
+        self.client = client or get_client()
+
+    def round_trip(self, start_lat, start_lon, distance_km, seed):
+        return self.client.round_trip(start_lat, start_lon, distance_km, seed, self.profile)
+
+    def round_trips(self, start_lat, start_lon, distance_km, seeds):
+        return self.client.round_trips(start_lat, start_lon, distance_km, seeds, self.profile)
+
+
+class LocalRouter:
+    """
+    Boucles calculées par `find_loops` sur le graphe OSM : tuile du cache
+    autour du départ (téléchargée si absente), ou extrait local `extract`
+    entièrement hors ligne. Une graine donne toujours la même boucle.
+    """
+
+    def __init__(self, extract=None, network_type="walk", workers=None):
+        self.extract = extract
+        self.network_type = network_type
+        self.workers = workers
+
+    def graph(self, start_lat, start_lon, distance_km):
+        if self.extract:
+            return load_compact_extract(self.extract, self.network_type)
+        if distance_km >= TILED_FROM_KM:
+            # Une boucle ne s'éloigne jamais du départ de plus de la moitié de sa longueur
+            qlat, qlon, radius = quantize(start_lat, start_lon, (1 + LOOP_TOLERANCE) * distance_km * 500)
+            return load_tiled_graph(qlat, qlon, radius, self.network_type)
+        return load_compact_graph(start_lat, start_lon, place_radius(distance_km), self.network_type)
+
+    def loops(self, start_lat, start_lon, distance_km, num_routes=1, seed=None):
+        """
+        Graphe autour du départ et jusqu'à `num_routes` boucles de `distance_km`
+        (chemin en indices de nœuds, longueur en m), comme `find_loops`.
+        """
+        graph = self.graph(start_lat, start_lon, distance_km)
+        if len(graph) == 0:
+            logging.warning("Aucune route autour de (%s, %s)", start_lat, start_lon)
+            return graph, []
+        start_node = int(graph.nearest(start_lat, start_lon)[0])
+        landmarks = graph.landmarks if distance_km >= TILED_FROM_KM else None
+        return graph, find_loops(graph, start_node, distance_km * 1000, num_routes=num_routes, seed=seed,
+                                 tolerance=LOOP_TOLERANCE, workers=self.workers, landmarks=landmarks)
+
+    def round_trip(self, start_lat, start_lon, distance_km, seed):
+        graph, loops = self.loops(start_lat, start_lon, distance_km, seed=seed)
+        if not loops:
+            logging.warning("Aucune boucle locale de %s km (graine %s)", distance_km, seed)
+            return []
+        return loop_coords(graph, loops[0][0])
+
+    def round_trips(self, start_lat, start_lon, distance_km, seeds):
+        """
+        Une seule recherche pour toutes les graines : les arbres de plus courts
+        chemins sont calculés une fois et les boucles rendues ne se recouvrent
+        pas (voir `find_loops`). Une liste vide complète les boucles manquantes.
+        """
+        seeds = list(seeds)
+        # Graine de la recherche tirée de toutes les graines (hash d'entiers stable
+        # d'une exécution à l'autre) ; une graine seule donne la boucle de `round_trip`
+        seed = seeds[0] if len(seeds) == 1 else hash(tuple(seeds))
+        graph, loops = self.loops(start_lat, start_lon, distance_km, num_routes=len(seeds), seed=seed)
+        if len(loops) < len(seeds):
+            logging.warning("%s boucle(s) locale(s) de %s km sur %s demandées", len(loops), distance_km, len(seeds))
+        routes = [loop_coords(graph, path) for path, _ in loops]
+        return routes + [[] for _ in range(len(seeds) - len(routes))]
+
+
+_routers = {}
+
+
+def get_router(name=None, activity=DEFAULT_ACTIVITY, workers=None):
+    """
+    Routeur partagé par le processus ("ors" ou "local", TCX_ROUTER par défaut)
+    pour le profil du type d'activité ; `workers` processus évaluent les
+    boucles locales (TCX_LOOP_WORKERS par défaut).
+    """
+    name = name or ROUTER
+    workers = LOOP_WORKERS if workers is None else workers
+    network_type, profile = PROFILES.get(activity, PROFILES[DEFAULT_ACTIVITY])
+    key = (name, network_type, profile, workers)
+    if key not in _routers:
+        if name == "ors":
+            _routers[key] = ORSRouter(profile)
+        elif name == "local":
+            _routers[key] = LocalRouter(OSM_EXTRACT, network_type, workers)
+        else:
+            raise ValueError(f"Routeur inconnu : {name}")
+    return _routers[key]
@@ -0,0 +1,79 @@
+import numpy as np
+
+METERS_PER_DEG_LAT = 111320.0
+
+
+class SpatialIndex:
+    """
+    Index k-d (scipy cKDTree) des nœuds d'un graphe, en mètres dans une
+    projection équirectangulaire centrée sur la zone. Construit une fois par
+    graphe, il répond en moins d'une milliseconde aux recherches de plus proche
+    nœud et de couronne autour d'un point.
+
+    `nodes` donne l'indice de graphe de chaque point indexé (par défaut
+    0..N-1) : les résultats sont toujours des indices de nœuds du graphe.
+    """
+
+    def __init__(self, lat, lon, nodes=None, ref_lat=None):
+        from scipy.spatial import cKDTree
+
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        self.nodes = np.arange(len(lat)) if nodes is None else np.asarray(nodes)
+        if ref_lat is None:
+            ref_lat = float(lat.mean()) if len(lat) else 0.0
+        self.ref_lat = ref_lat
+        self._cos_lat = np.cos(np.radians(self.ref_lat))
+        self._lat = lat
+        self._lon = lon
+        self.tree = cKDTree(self._project(lat, lon)) if len(lat) else None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def nbytes(self):
+        total = self.nodes.nbytes
+        if self.tree is not None:
+            total += self.tree.data.nbytes + self.tree.indices.nbytes
+        return total
+
+    def _project(self, lat, lon):
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        return np.column_stack((lon * self._cos_lat, lat)) * METERS_PER_DEG_LAT
+
+    def subset(self, nodes):
+        """
+        Index restreint aux nœuds `nodes` (indices de graphe triés, présents dans
+        cet index), dans la même projection.
+        """
+        position = np.searchsorted(self.nodes, nodes)
+        return SpatialIndex(self._lat[position], self._lon[position], nodes, self.ref_lat)
+
+    def nearest(self, lat, lon):
+        """
+        Nœud le plus proche de chaque point (lat, lon).
+        """
+        _, position = self.tree.query(self._project(lat, lon))
+        return self.nodes[position]
+
+    def within(self, lat, lon, radius_m):
+        """
+        Nœuds à moins de `radius_m` mètres du point (lat, lon), triés.
+        """
+        if self.tree is None:
+            return self.nodes[:0]
+        position = self.tree.query_ball_point(self._project(lat, lon)[0], radius_m)
+        return np.sort(self.nodes[position])
+
+    def annulus(self, lat, lon, r1_m, r2_m):
+        """
+        Nœuds entre `r1_m` et `r2_m` mètres du point (lat, lon), triés.
+        """
+        if self.tree is None:
+            return self.nodes[:0]
+        center = self._project(lat, lon)[0]
+        position = np.asarray(self.tree.query_ball_point(center, r2_m), dtype=np.int64)
+        distance = np.hypot(*(self.tree.data[position] - center).T)
+        return np.sort(self.nodes[position[distance >= r1_m]])
@@ -0,0 +1,96 @@
+from datetime import datetime
+import numpy as np
+from xml.sax.saxutils import escape
+
+NSMAP = "http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2"
+
+# Gabarits pré-formatés : même sortie octet pour octet qu'ElementTree
+HEADER = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    '<TrainingCenterDatabase xmlns="' + NSMAP + '"><Activities>'
+)
+ACTIVITY_START = '<Activity Sport="{sport}"><Id>{id}</Id><Lap StartTime="{start}">'
+LAP_TOTALS = (
+    "<TotalTimeSeconds>{seconds}</TotalTimeSeconds>"
+    "<DistanceMeters>{distance}</DistanceMeters>"
+    "<Calories>{calories}</Calories>"
+)
+TRACKPOINT = (
+    "<Trackpoint><Time>{}</Time>"
+    "<Position><LatitudeDegrees>{}</LatitudeDegrees><LongitudeDegrees>{}</LongitudeDegrees></Position>"
+    "<AltitudeMeters>{}</AltitudeMeters>"
+    "<HeartRateBpm><Value>{}</Value></HeartRateBpm></Trackpoint>"
+)
+FOOTER = "</Activities></TrainingCenterDatabase>"
+
+
+class TCXWriter:
+    """
+    Écriture en flux d'un fichier TCX vers un objet fichier binaire : les
+    Trackpoints sont formatés par lots de `chunk_size` et écrits aussitôt, la
+    mémoire utilisée ne dépend donc pas de la durée de l'activité.
+
+    Les totaux du tour (`lap_totals` = (secondes, distance, calories)) sont
+    écrits avant la trace s'ils sont connus à l'ouverture, sinon après, lors de
+    `close`.
+
+    Sans `activity_type`, le fichier est ouvert sans activité : chaque
+    activité (un tour) est alors écrite entre `start_activity` et
+    `end_activity`, autant de fois que nécessaire, avant `close()`.
+    """
+
+    def __init__(self, out, activity_type=None, start_time=None, lap_totals=None, chunk_size=1000):
+        self.out = out
+        self.chunk_size = chunk_size
+        self._buffer = []
+        self._in_activity = False
+        self._write(HEADER)
+        if activity_type is not None:
+            self.start_activity(activity_type, start_time, lap_totals)
+
+    def _write(self, text):
+        self.out.write(text.encode("utf-8"))
+
+    def _flush(self):
+        if self._buffer:
+            self._write("".join(self._buffer))
+            self._buffer = []
+
+    def start_activity(self, activity_type, start_time=None, lap_totals=None):
+        start = (start_time or datetime.now()).isoformat()
+        self._write(ACTIVITY_START.format(sport=escape(activity_type, {'"': "&quot;"}), id=start, start=start))
+        self._lap_totals_written = lap_totals is not None
+        if lap_totals is not None:
+            self._write(LAP_TOTALS.format(seconds=lap_totals[0], distance=lap_totals[1], calories=lap_totals[2]))
+        self._write("<Track>")
+        self._in_activity = True
+
+    def write_trackpoint(self, time, lat, lon, altitude, heart_rate):
+        self._buffer.append(TRACKPOINT.format(time.isoformat(), lat, lon, altitude, heart_rate))
+        if len(self._buffer) >= self.chunk_size:
+            self._flush()
+
+    def write_trackpoints(self, times, lats, lons, altitudes, heart_rates):
+        """
+        Écrit un lot de points depuis des tableaux (horodatages ISO 8601 déjà
+        formatés), par tranches de `chunk_size`.
+        """
+        self._flush()
+        columns = [np.asarray(c) for c in (times, lats, lons, altitudes, heart_rates)]
+        for start in range(0, len(columns[0]), self.chunk_size):
+            # Seule la tranche en cours est convertie en objets Python
+            rows = zip(*(c[start:start + self.chunk_size].tolist() for c in columns))
+            self._write("".join(TRACKPOINT.format(*row) for row in rows))
+
+    def end_activity(self, total_seconds=None, distance_m=None, calories=None):
+        self._flush()
+        self._write("</Track>")
+        if not self._lap_totals_written:
+            self._write(LAP_TOTALS.format(seconds=total_seconds, distance=distance_m, calories=calories))
+        self._write("</Lap></Activity>")
+        self._in_activity = False
+
+    def close(self, total_seconds=None, distance_m=None, calories=None):
+        if self._in_activity:
+            self.end_activity(total_seconds, distance_m, calories)
+        self._write(FOOTER)
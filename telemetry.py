@@ -0,0 +1,159 @@
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+from geodesy import segment_lengths
+from physiology import (SPEED_COMPENSATION, grade_adjusted_speed, grade_cost, heart_rate_response,
+                        segment_grades)
+from polyline import simplify_mask
+
+MIN_TIME_STEP_S = 3  # au moins 3 s entre deux points enregistrés (un point par sommet)
+MIN_SPEED_MS = 0.1   # plancher de la vitesse locale bruitée (échantillonnage régulier)
+HR_NOISE_BPM = 1.5   # bruit de mesure du cardiofréquencemètre (modèle physiologique)
+
+Telemetry = namedtuple("Telemetry", [
+    "elapsed_s",    # secondes depuis le départ (int)
+    "time",         # horodatages ISO 8601 (str)
+    "lat",
+    "lon",
+    "altitude",     # m
+    "heart_rate",   # bpm (int)
+    "speed_kmh",    # vitesse moyenne sur le segment qui mène au point
+    "distance_m",   # distance cumulée
+    "calories",
+])
+
+
+def synthesize_telemetry(coords, avg_speed_kmh, hr_avg, seed=None, start_time=None, interval_s=None,
+                         elevation=None, physiology=True):
+    """
+    Génère en un seul lot les séries d'une activité le long d'un tracé
+    [(lon, lat), ...] : vitesse bruitée, temps de passage, FC, altitude et
+    distance cumulée. Le fichier TCX et le graphique consomment les mêmes
+    tableaux ; une même graine donne la même activité.
+
+    Sans `interval_s`, un point par sommet du tracé, espacés d'au moins
+    MIN_TIME_STEP_S secondes. Avec `interval_s`, les temps de passage aux
+    sommets suivent exactement le profil de vitesse et les points sont
+    interpolés toutes les `interval_s` secondes : ceil(durée / interval_s) + 1
+    points, quelle que soit la densité des sommets.
+
+    `elevation` (ex. `elevation.DEMTiles`) donne l'altitude de chaque point
+    enregistré à partir de (lat, lon) ; là où il renvoie NaN, le profil
+    synthétique est conservé, et compté comme plat pour la pente.
+
+    Avec `physiology`, la vitesse est ajustée à la pente et la FC suit l'effort
+    avec retard (voir physiology.py) ; sinon FC = moyenne + bruit indépendant
+    en chaque point.
+    """
+    rng = np.random.default_rng(seed)
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    n = len(coords)
+    i = np.arange(n)
+
+    segments = segment_lengths(coords)
+    # Vitesse locale : variation sinusoïdale + bruit réaliste (±10 % max)
+    factor = 1 + 0.1 * np.sin(i[1:] / 10) + rng.normal(0, 0.05, size=n - 1)
+    local_speed = avg_speed_kmh / 3.6 * factor
+    distance = np.zeros(n)
+    np.cumsum(segments, out=distance[1:])
+    heart_rate = rng.normal(0, HR_NOISE_BPM if physiology else 5, size=n)
+    calories = int(rng.integers(300, 800))
+    altitude = 200 + np.sin(i / 10)
+    start = np.datetime64((start_time or datetime.now()).replace(tzinfo=None), "us")
+
+    if physiology:
+        # Pente des segments dont les deux extrémités ont une altitude mesurée ;
+        # ailleurs plat : le profil synthétique suit les sommets, pas le terrain
+        grade = np.zeros(n - 1)
+        if elevation is not None:
+            measured = elevation(coords[:, 1], coords[:, 0])
+            altitude = np.where(np.isnan(measured), altitude, measured)
+            known = ~np.isnan(measured)
+            grade = np.where(known[1:] & known[:-1], segment_grades(altitude, segments), 0.0)
+        local_speed = grade_adjusted_speed(local_speed, grade)
+        effort = factor * grade_cost(grade) ** (1 - SPEED_COMPENSATION)
+
+    if interval_s is not None:
+        vertex_s = np.zeros(n)
+        np.cumsum(segments / np.maximum(local_speed, MIN_SPEED_MS), out=vertex_s[1:])
+        heart_rate += heart_rate_response(vertex_s, effort, hr_avg) if physiology else hr_avg
+        telemetry = _resample(vertex_s, distance, coords, altitude, heart_rate, calories, interval_s, start)
+        return _with_elevation(telemetry, elevation)
+
+    time_steps = np.maximum(MIN_TIME_STEP_S, (segments / local_speed).astype(np.int64))
+    elapsed = np.zeros(n, dtype=np.int64)
+    np.cumsum(time_steps, out=elapsed[1:])
+    heart_rate += heart_rate_response(elapsed, effort, hr_avg) if physiology else hr_avg
+    speed_kmh = np.empty(n)
+    speed_kmh[1:] = segments / time_steps * 3.6
+    speed_kmh[:1] = speed_kmh[1:2] if n > 1 else 0.0
+
+    telemetry = Telemetry(
+        elapsed_s=elapsed,
+        time=_timestamps(start, elapsed),
+        lat=coords[:, 1],
+        lon=coords[:, 0],
+        altitude=altitude,
+        heart_rate=heart_rate.astype(np.int64),
+        speed_kmh=speed_kmh,
+        distance_m=distance,
+        calories=calories,
+    )
+    return _with_elevation(telemetry, elevation)
+
+
+def _with_elevation(telemetry, elevation):
+    if elevation is None:
+        return telemetry
+    measured = elevation(telemetry.lat, telemetry.lon)
+    return telemetry._replace(altitude=np.where(np.isnan(measured), telemetry.altitude, measured))
+
+
+def _timestamps(start, elapsed):
+    return np.datetime_as_string(start + elapsed.astype("timedelta64[s]"), unit="us")
+
+
+def _resample(vertex_s, distance, coords, altitude, heart_rate, calories, interval_s, start):
+    """
+    Interpolation linéaire en temps des séries définies aux sommets (instants
+    `vertex_s`) sur une grille régulière ; le dernier instant de la grille
+    couvre l'arrivée, où la position reste figée.
+    """
+    count = int(np.ceil(vertex_s[-1] / interval_s))
+    elapsed = np.arange(count + 1, dtype=np.int64) * interval_s
+    distance_at = np.interp(elapsed, vertex_s, distance)
+    speed_kmh = np.empty(count + 1)
+    speed_kmh[1:] = np.diff(distance_at) / interval_s * 3.6
+    speed_kmh[:1] = speed_kmh[1:2] if count else 0.0
+
+    # Position et altitude interpolées le long de la distance cumulée, FC dans le temps
+    return Telemetry(
+        elapsed_s=elapsed,
+        time=_timestamps(start, elapsed),
+        lat=np.interp(distance_at, distance, coords[:, 1]),
+        lon=np.interp(distance_at, distance, coords[:, 0]),
+        altitude=np.interp(distance_at, distance, altitude),
+        heart_rate=np.interp(elapsed, vertex_s, heart_rate).astype(np.int64),
+        speed_kmh=speed_kmh,
+        distance_m=distance_at,
+        calories=calories,
+    )
+
+
+def smart_recording(telemetry, tolerance_m=2.0, max_interval_s=10):
+    """
+    Enregistrement « intelligent » à la manière des montres GPS : ne garde que
+    les points nécessaires pour suivre le tracé à `tolerance_m` mètres près
+    (les lignes droites se réduisent à leurs extrémités), avec au moins un
+    point toutes les `max_interval_s` secondes. S'applique de préférence à une
+    télémétrie échantillonnée régulièrement (`interval_s`).
+    """
+    keep = simplify_mask(np.column_stack((telemetry.lat, telemetry.lon)), tolerance_m)
+    # Premier point de chaque tranche de max_interval_s / 2 secondes : deux
+    # points conservés consécutifs ne sont jamais à plus de max_interval_s
+    bucket = np.asarray(telemetry.elapsed_s) // (max_interval_s / 2)
+    keep[1:] |= bucket[1:] != bucket[:-1]
+    return telemetry._replace(**{
+        field: np.asarray(getattr(telemetry, field))[keep]
+        for field in telemetry._fields if field != "calories"
+    })
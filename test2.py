@@ -1,11 +1,11 @@
 import streamlit as st
 import numpy as np
-import gpxpy.gpx
 import folium
 from streamlit_folium import st_folium
+from polyline import lod_points
 from datetime import datetime, timedelta
-import xml.etree.ElementTree as ET
 import io
+from tcx_writer import TCXWriter
 import requests
 
 # ---------- Helper functions ----------
@@ -39,33 +39,20 @@ def generate_route(start_lat, start_lon, distance_km):
 def add_noise(data, std_dev):
     return data + np.random.normal(0, std_dev, size=data.shape)
 
-def create_tcx(coords, speed_kmh, hr_avg, activity_type):
-    # Create XML structure
-    NSMAP = "http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2"
-    ET.register_namespace('', NSMAP)
-
-    tcx = ET.Element('TrainingCenterDatabase', xmlns=NSMAP)
-    activities = ET.SubElement(tcx, 'Activities')
-    activity = ET.SubElement(activities, 'Activity', Sport=activity_type)
-    ET.SubElement(activity, 'Id').text = datetime.now().isoformat()
-    lap = ET.SubElement(activity, 'Lap', StartTime=datetime.now().isoformat())
-    ET.SubElement(lap, 'TotalTimeSeconds').text = str(len(coords) * 5)
-    ET.SubElement(lap, 'DistanceMeters').text = str(len(coords) * (speed_kmh / 3.6) * 5)
-    ET.SubElement(lap, 'Calories').text = str(int(np.random.randint(300, 800)))
-    track = ET.SubElement(lap, 'Track')
-
+def create_tcx(coords, speed_kmh, hr_avg, activity_type, out=None):
+    # Écriture en flux : aucun arbre XML n'est gardé en mémoire
+    if out is None:
+        out = io.BytesIO()
     start_time = datetime.now()
+    lap_totals = (len(coords) * 5, len(coords) * (speed_kmh / 3.6) * 5, int(np.random.randint(300, 800)))
+    writer = TCXWriter(out, activity_type, start_time, lap_totals=lap_totals)
 
     for i, (lon, lat) in enumerate(coords):
-        tp = ET.SubElement(track, 'Trackpoint')
-        ET.SubElement(tp, 'Time').text = (start_time + timedelta(seconds=i * 5)).isoformat()
-        pos = ET.SubElement(tp, 'Position')
-        ET.SubElement(pos, 'LatitudeDegrees').text = str(lat)
-        ET.SubElement(pos, 'LongitudeDegrees').text = str(lon)
-        ET.SubElement(tp, 'AltitudeMeters').text = str(200 + np.sin(i / 10))
-        ET.SubElement(tp, 'HeartRateBpm').append(ET.Element('Value')).text = str(int(hr_avg + np.random.normal(0, 5)))
+        writer.write_trackpoint(start_time + timedelta(seconds=i * 5), lat, lon,
+                                200 + np.sin(i / 10), int(hr_avg + np.random.normal(0, 5)))
 
-    return ET.ElementTree(tcx)
+    writer.close()
+    return out
 
 # ---------- Streamlit Interface ----------
 st.title("Générateur de fichier TCX pour activité sportive")
@@ -94,12 +81,10 @@ if st.button("Générer le fichier TCX"):
             # Afficher la route sur la carte
             m = folium.Map(location=[lat, lon], zoom_start=13)
             folium.Marker([lat, lon], popup="Départ").add_to(m)
-            folium.PolyLine([(lat, lng) for lng, lat in route], color="blue").add_to(m)
+            folium.PolyLine(lod_points([(lat, lng) for lng, lat in route], zoom=13), color="blue").add_to(m)
             st_folium(m, height=400, width=700)
 
-            tcx_tree = create_tcx(coords, speed, hr, activity)
-            tcx_io = io.BytesIO()
-            tcx_tree.write(tcx_io, encoding='utf-8', xml_declaration=True)
+            tcx_io = create_tcx(coords, speed, hr, activity)
             st.download_button("📥 Télécharger le fichier TCX", data=tcx_io.getvalue(), file_name="activité.tcx", mime="application/xml")
     else:
         st.warning("Clique sur la carte pour définir un point de départ.")
@@ -0,0 +1,96 @@
+import os
+import logging
+from collections import OrderedDict
+import numpy as np
+from compact_graph import CompactGraph
+from graph_cache import GRID_DEG, grid_key, load_grid_tile
+from landmarks import LANDMARK_COUNT
+
+# Mémoire allouée aux mailles chargées et au graphe recousu
+MEMORY_BUDGET_MB = float(os.environ.get("TCX_GRAPH_MEMORY_MB", 512))
+
+
+def _nbytes(edges):
+    return sum(column.nbytes for column in edges)
+
+
+def search_nbytes(n_nodes, n_edges):
+    """
+    Majorant de la mémoire d'un graphe recousu prêt pour la recherche : tableaux
+    CSR, matrices scipy directe et transposée, index k-d et tables des repères
+    ALT (deux tables si le graphe n'est pas symétrique).
+    """
+    per_node = 3 * 8 + 8 + 2 * 8 + 3 * 8 + 2 * LANDMARK_COUNT * 4
+    per_edge = 4 + 8 + 2 * (8 + 8)
+    return n_nodes * per_node + n_edges * per_edge
+
+
+class TileSet:
+    """
+    Mailles de la grille d'un réseau, chargées à la demande (cache disque de
+    graph_cache.py) et gardées en mémoire sous forme de tableaux. `budget_mb`
+    borne la somme des mailles gardées et du graphe recousu avec ses structures
+    de recherche (`search_nbytes`) : les mailles les moins récemment utilisées
+    sont libérées, et l'expansion s'arrête avant de le dépasser.
+    """
+
+    def __init__(self, network_type="walk", budget_mb=MEMORY_BUDGET_MB, loader=load_grid_tile):
+        self.network_type = network_type
+        self.budget = budget_mb * 1e6
+        self.loader = loader
+        self._tiles = OrderedDict()
+
+    def tile(self, key):
+        edges = self._tiles.get(key)
+        if edges is None:
+            edges = self._tiles[key] = self.loader(key, self.network_type)
+        self._tiles.move_to_end(key)
+        return edges
+
+    def _trim(self, keep, reserved=0):
+        total = reserved + sum(_nbytes(edges) for edges in self._tiles.values())
+        for key in list(self._tiles):
+            if total <= self.budget:
+                break
+            if key not in keep:
+                total -= _nbytes(self._tiles.pop(key))
+
+    def stitch(self, keys):
+        """
+        `CompactGraph` des mailles `keys`, recousues par identifiant de nœud.
+        """
+        tiles = [self.tile(key) for key in sorted(keys)]
+        return CompactGraph.from_edges(*(np.concatenate(column) for column in zip(*tiles)))
+
+    def graph_around(self, lat, lon, radius_m):
+        """
+        Graphe couvrant tout ce qui est à moins de `radius_m` mètres du point par
+        le réseau. On part de la maille du point ; tant que le front d'une
+        recherche bornée à `radius_m` atteint des mailles absentes, elles sont
+        chargées et recousues. L'expansion s'arrête avant de dépasser le budget
+        mémoire : la recherche se fait alors sur les mailles déjà chargées.
+        """
+        keys = {grid_key(lat, lon)}
+        while True:
+            graph = self.stitch(keys)
+            if len(graph) == 0:
+                return graph
+            start = int(graph.nearest(lat, lon)[0])
+            dist, _ = graph.dijkstra(start, limit=radius_m)
+            reached = np.isfinite(dist)
+            rows = np.floor(graph.lat[reached] / GRID_DEG).astype(np.int64)
+            cols = np.floor(graph.lon[reached] / GRID_DEG).astype(np.int64)
+            frontier = set(map(tuple, np.unique(np.column_stack((rows, cols)), axis=0).tolist())) - keys
+            reserved = search_nbytes(len(graph), len(graph.lengths))
+            if not frontier:
+                break
+            # Mailles et graphe grossissent à peu près avec le nombre de mailles
+            tiles_size = sum(_nbytes(self._tiles[key]) for key in keys)
+            if (tiles_size + reserved) * (len(keys) + len(frontier)) / len(keys) > self.budget:
+                logging.warning("Budget mémoire du graphe atteint : recherche limitée à %s mailles", len(keys))
+                break
+            logging.info("Front de recherche sur %s nouvelles mailles (%s chargées)", len(frontier), len(keys))
+            keys |= frontier
+        # Les mailles d'autres zones cèdent la place au graphe recousu
+        self._trim(keys, reserved)
+        return graph